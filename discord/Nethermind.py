@@ -1,12 +1,19 @@
-import requests
+import async_transport
+import block_cache
+import jsonrpc
+import transport
 
 class NethermindModule:
-    def __init__(self, rpc_url):
+    def __init__(self, rpc_url, cache=None):
         """
         Initialize the module with the Nethermind RPC URL.
         :param rpc_url: The URL of the Nethermind RPC endpoint.
+        :param cache: Optional block_cache.FinalizedBlockCache for finalized blocks and transactions.
         """
         self.rpc_url = rpc_url
+        self.cache = cache
+        if cache is not None and cache.head_fn is None:
+            cache.head_fn = lambda: int(self.get_block_number()["result"], 16)
 
     def send_rpc_request(self, method, params=None):
         """
@@ -15,17 +22,22 @@ class NethermindModule:
         :param params: The parameters for the method.
         :return: Response from the RPC call.
         """
-        payload = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params or [],
-            "id": 1
-        }
-        response = requests.post(self.rpc_url, json=payload)
+        payload = jsonrpc.build_request(method, params)
+        response = transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"RPC request failed: {response.status_code}"}
 
+    def send_batch_rpc_request(self, calls, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Sends many RPC requests to Nethermind as JSON-RPC batch arrays.
+        :param calls: Iterable of (method, params) tuples.
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of responses in the same order as `calls`, each with
+                 its own "result" or "error".
+        """
+        return jsonrpc.send_batch(self.rpc_url, calls, chunk_size)
+
     def get_block_number(self):
         """
         Fetches the latest block number.
@@ -40,6 +52,12 @@ class NethermindModule:
         :return: Block details or error message.
         """
         hex_block_number = hex(block_number)
+        if self.cache is not None:
+            return self.cache.fetch(
+                "block", block_number,
+                lambda: self.send_rpc_request("eth_getBlockByNumber", [hex_block_number, True]),
+                block_cache.eth_block_number
+            )
         return self.send_rpc_request("eth_getBlockByNumber", [hex_block_number, True])
 
     def get_transaction_by_hash(self, tx_hash):
@@ -48,6 +66,12 @@ class NethermindModule:
         :param tx_hash: The transaction hash.
         :return: Transaction details or error message.
         """
+        if self.cache is not None:
+            return self.cache.fetch(
+                "transaction", tx_hash,
+                lambda: self.send_rpc_request("eth_getTransactionByHash", [tx_hash]),
+                block_cache.eth_transaction_block_number
+            )
         return self.send_rpc_request("eth_getTransactionByHash", [tx_hash])
 
     def get_balance(self, address):
@@ -58,6 +82,92 @@ class NethermindModule:
         """
         return self.send_rpc_request("eth_getBalance", [address, "latest"])
 
+    def get_blocks(self, block_numbers, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches many blocks by number in batches.
+        :param block_numbers: Iterable of block numbers, e.g. range(start, end).
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of block details or per-item errors, in input order.
+        """
+        def fetch(numbers):
+            calls = [("eth_getBlockByNumber", [hex(number), True]) for number in numbers]
+            return self.send_batch_rpc_request(calls, chunk_size)
+
+        if self.cache is not None:
+            return self.cache.fetch_many("block", block_numbers, fetch, block_cache.eth_block_number)
+        return fetch(block_numbers)
+
+    def get_transactions(self, tx_hashes, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches many transactions by hash in batches.
+        :param tx_hashes: Iterable of transaction hashes.
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of transaction details or per-item errors, in input order.
+        """
+        def fetch(hashes):
+            calls = [("eth_getTransactionByHash", [tx_hash]) for tx_hash in hashes]
+            return self.send_batch_rpc_request(calls, chunk_size)
+
+        if self.cache is not None:
+            return self.cache.fetch_many("transaction", tx_hashes, fetch, block_cache.eth_transaction_block_number)
+        return fetch(tx_hashes)
+
+    def get_balances(self, addresses, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches the balances of many addresses in batches.
+        :param addresses: Iterable of Ethereum addresses.
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of balances in Wei or per-item errors, in input order.
+        """
+        calls = [("eth_getBalance", [address, "latest"]) for address in addresses]
+        return self.send_batch_rpc_request(calls, chunk_size)
+
+
+class AsyncNethermindModule:
+    """
+    asyncio version of NethermindModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        """
+        Initialize the module with the Nethermind RPC URL.
+        :param rpc_url: The URL of the Nethermind RPC endpoint.
+        """
+        self.rpc_url = rpc_url
+
+    async def send_rpc_request(self, method, params=None):
+        payload = jsonrpc.build_request(method, params)
+        response = await async_transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"RPC request failed: {response.status_code}"}
+
+    async def send_batch_rpc_request(self, calls, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        return await jsonrpc.send_batch_async(self.rpc_url, calls, chunk_size)
+
+    async def get_block_number(self):
+        return await self.send_rpc_request("eth_blockNumber")
+
+    async def get_block_by_number(self, block_number):
+        return await self.send_rpc_request("eth_getBlockByNumber", [hex(block_number), True])
+
+    async def get_transaction_by_hash(self, tx_hash):
+        return await self.send_rpc_request("eth_getTransactionByHash", [tx_hash])
+
+    async def get_balance(self, address):
+        return await self.send_rpc_request("eth_getBalance", [address, "latest"])
+
+    async def get_blocks(self, block_numbers, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getBlockByNumber", [hex(number), True]) for number in block_numbers]
+        return await self.send_batch_rpc_request(calls, chunk_size)
+
+    async def get_transactions(self, tx_hashes, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes]
+        return await self.send_batch_rpc_request(calls, chunk_size)
+
+    async def get_balances(self, addresses, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getBalance", [address, "latest"]) for address in addresses]
+        return await self.send_batch_rpc_request(calls, chunk_size)
+
 
 # Example Usage:
 if __name__ == "__main__":
@@ -70,4 +180,17 @@ if __name__ == "__main__":
     print("Latest Block Number:", block_number)
 
     # Fetch a block by number
-    block_info = nether
+    block_info = nethermind.get_block_by_number(12345678)
+    print("Block Info:", block_info)
+
+    # Fetch a transaction by hash
+    transaction_info = nethermind.get_transaction_by_hash("0x1234...")
+    print("Transaction Info:", transaction_info)
+
+    # Fetch the balance of an address
+    balance = nethermind.get_balance("0x0000000000000000000000000000000000000000")
+    print("Balance:", balance)
+
+    # Fetch a range of blocks in batches of 100
+    blocks = nethermind.get_blocks(range(12345600, 12345700), chunk_size=100)
+    print("Fetched blocks:", sum(1 for block in blocks if "result" in block))
@@ -1,8 +1,8 @@
 import datetime
-import json
 import random
-from web3 import Web3
-import ipfshttpclient
+
+from activity_store import ActivityStore
+from activity_uploader import ActivityUploader
 
 # Mock data for user activity
 USER_ACTIVITY = [
@@ -10,56 +10,28 @@ USER_ACTIVITY = [
     for i in range(1, 101)
 ]
 
-class DecentralizedUserUploader:
-    def __init__(self, rpc_url, contract_address, contract_abi, ipfs_url="/ip4/127.0.0.1/tcp/5001"):
+# Time-indexed view of the activity data, shared by all uploaders
+ACTIVITY_STORE = ActivityStore.from_records(USER_ACTIVITY)
+
+class DecentralizedUserUploader(ActivityUploader):
+    def __init__(self, rpc_url, contract_address, contract_abi, ipfs_url="/ip4/127.0.0.1/tcp/5001",
+                 activity_store=None, activity_log=None, snapshot_state="active_users_snapshot.json",
+                 fee_oracle=None):
         """
         Initializes the uploader with Ethereum and IPFS details.
         :param rpc_url: Ethereum node RPC URL.
         :param contract_address: Address of the smart contract.
         :param contract_abi: ABI of the smart contract.
         :param ipfs_url: URL for the IPFS client.
+        :param activity_store: ActivityStore to query, defaults to ACTIVITY_STORE.
+        :param activity_log: Directory of the bot's ActivityEventLog (or an ActivityLogReader); when given,
+                             activity is read from it, read-only.
+        :param snapshot_state: Local file tracking the latest incremental snapshot.
+        :param fee_oracle: FeeOracle shared with the bot's other submitters on this chain.
         """
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
-        self.contract = self.web3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=contract_abi)
-        self.ipfs = ipfshttpclient.connect(ipfs_url)
-
-    def collect_active_users(self, days):
-        """
-        Filters users active within the last `days` days.
-        :param days: Number of days to consider for activity.
-        :return: List of active user IDs.
-        """
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
-        return [user["user_id"] for user in USER_ACTIVITY if user["last_active"] >= cutoff_date]
-
-    def upload_to_ipfs(self, data):
-        """
-        Uploads data to IPFS.
-        :param data: Data to upload.
-        :return: IPFS hash.
-        """
-        json_data = json.dumps(data)
-        result = self.ipfs.add_str(json_data)
-        return result
-
-    def upload_to_smart_contract(self, ipfs_hash, sender_address, private_key):
-        """
-        Calls the smart contract to upload metadata.
-        :param ipfs_hash: IPFS hash of the uploaded data.
-        :param sender_address: Ethereum address of the sender.
-        :param private_key: Private key of the sender.
-        :return: Transaction receipt.
-        """
-        tx = self.contract.functions.storeData(ipfs_hash).build_transaction({
-            'from': sender_address,
-            'nonce': self.web3.eth.get_transaction_count(sender_address),
-            'gas': 3000000,
-            'gasPrice': self.web3.to_wei('20', 'gwei')
-        })
-
-        signed_tx = self.web3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        return self.web3.eth.wait_for_transaction_receipt(tx_hash)
+        super().__init__(rpc_url, contract_address, contract_abi, ipfs_url,
+                         activity_store if activity_store is not None else ACTIVITY_STORE,
+                         activity_log=activity_log, snapshot_state=snapshot_state, fee_oracle=fee_oracle)
 
 
 # Example Usage
@@ -88,3 +60,14 @@ if __name__ == "__main__":
     # Upload IPFS hash to smart contract
     tx_receipt = uploader.upload_to_smart_contract(ipfs_hash, SENDER_ADDRESS, PRIVATE_KEY)
     print(f"Smart contract transaction successful: {tx_receipt}")
+
+    # Incremental snapshot: only the delta is uploaded, and nothing at all if activity is unchanged
+    snapshot_cid, snapshot_receipt = uploader.upload_snapshot(
+        {"last_day": active_users_day, "last_month": active_users_month}, SENDER_ADDRESS, PRIVATE_KEY
+    )
+    print(f"Snapshot {snapshot_cid} rebuilds to: {uploader.load_snapshot(snapshot_cid)}")
+
+    # Large guilds: compact binary encoding, streamed to IPFS in chunks
+    compact_hash = uploader.upload_to_ipfs({"last_day": active_users_day, "last_month": active_users_month},
+                                           encoding="compact")
+    print(f"Compact snapshot manifest: {compact_hash}")
@@ -0,0 +1,335 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+from activity_store import ActivityStore
+
+# One event: float64 epoch seconds + uint64 user id (Discord snowflakes fit in 64 bits)
+RECORD = struct.Struct("<dQ")
+SEGMENT_PREFIX = "segment-"
+COMPACTED_FILE = "compacted.log"
+
+
+def _read_records(buffer):
+    """
+    Yields (timestamp, user_id) records from a buffer until the first empty slot.
+    """
+    for offset in range(0, len(buffer) - RECORD.size + 1, RECORD.size):
+        timestamp, user_id = RECORD.unpack_from(buffer, offset)
+        if timestamp == 0.0:
+            return
+        yield timestamp, user_id
+
+
+def _read_file(path):
+    """
+    Yields the records of a segment or compacted file through a read-only map.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < RECORD.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from _read_records(buffer)
+
+
+def _segment_numbers(directory):
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(".log"):
+            numbers.append(int(name[len(SEGMENT_PREFIX):-4]))
+    return sorted(numbers)
+
+
+class ActivityLogReader:
+    """
+    Read-only view of an ActivityEventLog directory written by another process (the bot).
+
+    Files are mapped read-only and no background thread is started, so any
+    number of readers can run next to the writer without touching its
+    segments or compaction.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Directory the bot's ActivityEventLog writes to.
+        """
+        self.directory = directory
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}.log")
+
+    def iter_events(self, since=None):
+        """
+        Yields every retained (timestamp, user_id) event: compacted history first, then segments in order.
+        :param since: Only yield events later than this epoch timestamp (e.g. the newest one seen before).
+        """
+        for attempt in range(3):
+            compacted_path = os.path.join(self.directory, COMPACTED_FILE)
+            paths = ([compacted_path] if os.path.exists(compacted_path) else []) + \
+                [self._segment_path(number) for number in _segment_numbers(self.directory)]
+            try:
+                # Read everything first: the writer may compact and remove segments meanwhile
+                events = [event for path in paths for event in _read_file(path)
+                          if since is None or event[0] > since]
+            except FileNotFoundError:
+                continue
+            yield from events
+            return
+        raise RuntimeError(f"Activity log in {self.directory} kept changing while being read")
+
+    def latest_activity(self):
+        """
+        :return: Dictionary of user id -> latest activity timestamp.
+        """
+        latest = {}
+        for timestamp, user_id in self.iter_events():
+            if timestamp > latest.get(user_id, 0.0):
+                latest[user_id] = timestamp
+        return latest
+
+    def to_activity_store(self):
+        """
+        Loads the retained events into an ActivityStore for window queries.
+        """
+        store = ActivityStore()
+        store.record_many((user_id, timestamp) for timestamp, user_id in self.iter_events())
+        return store
+
+
+class ActivityEventLog(ActivityLogReader):
+    """
+    Persistent append-only log of user activity events.
+
+    - Events go to fixed-size, preallocated segment files that are memory-mapped.
+      An append is one struct.pack_into into the map, with no system call.
+    - A background thread msyncs dirty pages every `sync_interval` seconds or
+      after `sync_every` events, so durability is batched instead of per event.
+    - The next segment is preallocated and mapped by the background thread, so
+      rolling over in append() only swaps a pointer. Sealed segments are flushed
+      and closed in the background too, so append never waits on disk I/O.
+    - Compaction folds sealed segments into one file holding each user's
+      latest activity, so the log's size tracks the number of members,
+      not the number of messages.
+
+    Unused slots in a segment are zero, so after a crash the write position is
+    found again by binary search for the first empty record.
+
+    Only one process may write a directory; other processes read it with
+    ActivityLogReader.
+    """
+
+    def __init__(self, directory, segment_events=1_000_000, sync_interval=1.0, sync_every=10_000,
+                 compact_after_segments=4):
+        """
+        :param directory: Directory holding the segments.
+        :param segment_events: Events per segment file (16 bytes each).
+        :param sync_interval: Seconds between background msyncs.
+        :param sync_every: Also msync once this many events are unsynced.
+        :param compact_after_segments: Compact once this many sealed segments exist.
+        """
+        super().__init__(directory)
+        self.segment_bytes = segment_events * RECORD.size
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.compact_after_segments = compact_after_segments
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()          # append state; never held during disk I/O
+        self._flush_lock = threading.Lock()    # msync / close of maps
+        self._compact_lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_offset = 0
+        self._next = None       # preallocated (number, file, map) for the next segment
+        self._sealing = []      # (file, map) of full segments waiting to be flushed and closed
+        self._wake = threading.Event()
+        self._closed = False
+        self.counters = {"appended": 0, "syncs": 0, "compactions": 0}
+
+        segments = _segment_numbers(directory)
+        self._segment, self._file, self._map = self._map_segment(segments[-1] if segments else 0)
+        self._offset = self._find_end(self._map)
+        self._syncer = threading.Thread(target=self._sync_loop, name="activity-log-sync", daemon=True)
+        self._syncer.start()
+
+    def _map_segment(self, number):
+        path = self._segment_path(number)
+        file = open(path, "a+b")
+        if os.path.getsize(path) < self.segment_bytes:
+            file.truncate(self.segment_bytes)
+        return number, file, mmap.mmap(file.fileno(), self.segment_bytes)
+
+    @staticmethod
+    def _find_end(buffer):
+        lo, hi = 0, len(buffer) // RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RECORD.unpack_from(buffer, mid * RECORD.size)[0] == 0.0:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo * RECORD.size
+
+    def append(self, user_id, timestamp=None):
+        """
+        Records one activity event. Cheap enough to call from the bot's event loop.
+        :param user_id: Integer user id (e.g. message.author.id).
+        :param timestamp: Epoch seconds, defaults to now.
+        """
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            if self._offset + RECORD.size > self.segment_bytes:
+                self._roll()
+            RECORD.pack_into(self._map, self._offset, timestamp, int(user_id))
+            self._offset += RECORD.size
+            self._unsynced += 1
+            self.counters["appended"] += 1
+            if self._unsynced >= self.sync_every:
+                self._wake.set()
+
+    def _roll(self):
+        # Called with self._lock held: hand the full segment to the background thread and switch maps.
+        if self._next is None or self._next[0] != self._segment + 1:
+            # The background thread has not preallocated yet (only if appends outrun it)
+            self._next = self._map_segment(self._segment + 1)
+        self._sealing.append((self._file, self._map))
+        self._segment, self._file, self._map = self._next
+        self._next = None
+        self._offset = 0
+        self._synced_offset = 0
+        self._unsynced = 0
+        self._wake.set()
+
+    def _prepare_next(self):
+        with self._lock:
+            number = None if self._next is not None else self._segment + 1
+        if number is None:
+            return
+        prepared = self._map_segment(number)
+        with self._lock:
+            if self._next is None and self._segment + 1 == number:
+                self._next, prepared = prepared, None
+        if prepared is not None:
+            prepared[2].close()
+            prepared[1].close()
+
+    def _seal(self):
+        with self._lock:
+            sealing, self._sealing = self._sealing, []
+        with self._flush_lock:
+            for file, buffer in sealing:
+                buffer.flush()
+                buffer.close()
+                file.close()
+
+    def sync(self):
+        """
+        Flushes appended events to disk now. Only the dirty range is msynced, outside the append lock.
+        """
+        with self._lock:
+            if not self._unsynced:
+                return
+            buffer, start, end = self._map, self._synced_offset, self._offset
+            self._synced_offset = end
+            self._unsynced = 0
+        start -= start % mmap.ALLOCATIONGRANULARITY
+        with self._flush_lock:
+            if not buffer.closed:
+                buffer.flush(start, end - start)
+        self.counters["syncs"] += 1
+
+    def _sync_loop(self):
+        while not self._closed:
+            try:
+                self._seal()
+                self._prepare_next()
+                self.sync()
+                if len(self._sealed_segments()) >= self.compact_after_segments:
+                    self.compact()
+            except Exception as e:
+                print(f"Activity log background error: {e}")
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+
+    def _sealed_segments(self):
+        with self._lock:
+            active = self._segment
+        return [number for number in _segment_numbers(self.directory) if number < active]
+
+    def compact(self):
+        """
+        Replaces the compacted file and all sealed segments with one file
+        holding each user's latest event, oldest first.
+        """
+        with self._compact_lock:
+            sealed = self._sealed_segments()
+            if not sealed:
+                return
+            latest = {}
+            compacted_path = os.path.join(self.directory, COMPACTED_FILE)
+            sources = ([compacted_path] if os.path.exists(compacted_path) else []) + \
+                [self._segment_path(number) for number in sealed]
+            for path in sources:
+                for timestamp, user_id in _read_file(path):
+                    if timestamp > latest.get(user_id, 0.0):
+                        latest[user_id] = timestamp
+
+            tmp_path = compacted_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for user_id, timestamp in sorted(latest.items(), key=lambda item: item[1]):
+                    f.write(RECORD.pack(timestamp, user_id))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, compacted_path)
+            for number in sealed:
+                os.remove(self._segment_path(number))
+            self.counters["compactions"] += 1
+
+    def iter_events(self, since=None):
+        """
+        Yields every retained (timestamp, user_id) event: compacted history first, then segments in order.
+        :param since: Only yield events later than this epoch timestamp.
+        """
+        with self._compact_lock:
+            # The active segment and the list of sealed ones are taken together, so a rollover
+            # in between cannot drop the segment that was just sealed
+            with self._lock:
+                active_number = self._segment
+                active = bytes(self._map[:self._offset])
+            compacted_path = os.path.join(self.directory, COMPACTED_FILE)
+            paths = ([compacted_path] if os.path.exists(compacted_path) else []) + \
+                [self._segment_path(number) for number in _segment_numbers(self.directory) if number < active_number]
+            # Read everything before yielding: compaction must not wait on the consumer
+            events = [event for path in paths for event in _read_file(path) if since is None or event[0] > since]
+        events.extend(event for event in _read_records(active) if since is None or event[0] > since)
+        yield from events
+
+    def close(self):
+        """
+        Stops the background thread and flushes everything to disk.
+        """
+        self._closed = True
+        self._wake.set()
+        self._syncer.join()
+        self._seal()
+        with self._lock:
+            maps = [(self._file, self._map)] + ([self._next[1:]] if self._next else [])
+            self._next = None
+        with self._flush_lock:
+            for file, buffer in maps:
+                buffer.flush()
+                buffer.close()
+                file.close()
+
+
+# Example Usage:
+if __name__ == "__main__":
+    log = ActivityEventLog("activity_log_demo", segment_events=1000, compact_after_segments=2)
+    now = time.time()
+    for i in range(5000):
+        log.append(1000 + i % 50, now - 5000 + i)
+    log.compact()
+    print(log.counters)
+    print(f"{len(log.latest_activity())} users, last hour: {len(log.to_activity_store().users_since(now - 3600))}")
+    log.close()
@@ -0,0 +1,162 @@
+import datetime
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter. With the default precision of 12 it uses
+    4096 one-byte registers (4 KB) and has about 1.6% standard error, no
+    matter how many distinct users it sees. Sketches merge losslessly, so a
+    window's sketch is the merge of its days.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        """
+        :param precision: log2 of the number of registers (4-16).
+        :param registers: Existing register bytes, e.g. from to_bytes().
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError("register size does not match precision")
+
+    def add(self, item):
+        """
+        Adds one item (any value with a stable str()).
+        """
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        index = value >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = value & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        Folds `other` into this sketch (set union).
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    @classmethod
+    def union(cls, sketches, precision=12):
+        """
+        :return: A new sketch for the union of `sketches`.
+        """
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def count(self):
+        """
+        :return: Estimated number of distinct items added.
+        """
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        total = 0.0
+        for rank in set(self.registers):
+            total += self.registers.count(rank) * 2.0 ** -rank
+        estimate = alpha * m * m / total
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+
+class DailyActivitySketches:
+    """
+    Rolling per-day HyperLogLog sketches of active users.
+
+    Each day costs about 4 KB however many members are active. Any window is
+    answered by merging its days. Churn ("active then, not active now") is
+    estimated as |A ∪ B| - |B|, since HyperLogLog supports unions but not
+    direct set differences.
+    """
+
+    def __init__(self, precision=12, retention_days=90):
+        """
+        :param precision: HyperLogLog precision per day.
+        :param retention_days: Days kept before prune() drops them.
+        """
+        self.precision = precision
+        self.retention_days = retention_days
+        self.days = {}   # datetime.date -> HyperLogLog
+
+    @staticmethod
+    def _day(when):
+        if when is None:
+            return datetime.date.today()
+        if isinstance(when, datetime.datetime):
+            return when.date()
+        if isinstance(when, datetime.date):
+            return when
+        return datetime.datetime.fromtimestamp(when).date()
+
+    def record(self, user_id, when=None):
+        """
+        Counts `user_id` as active on the day of `when` (default today).
+        """
+        day = self._day(when)
+        sketch = self.days.get(day)
+        if sketch is None:
+            sketch = self.days[day] = HyperLogLog(self.precision)
+        sketch.add(user_id)
+
+    @classmethod
+    def from_records(cls, records, **kwargs):
+        """
+        Builds sketches from dicts with "user_id" and "last_active", like USER_ACTIVITY.
+        """
+        sketches = cls(**kwargs)
+        for record in records:
+            sketches.record(record["user_id"], record["last_active"])
+        return sketches
+
+    def window(self, start, end):
+        """
+        Merged sketch of the days in [start, end).
+        """
+        start_day, end_day = self._day(start), self._day(end)
+        return HyperLogLog.union(
+            (sketch for day, sketch in self.days.items() if start_day <= day < end_day),
+            self.precision
+        )
+
+    def estimate_active(self, start, end):
+        """
+        :return: Estimated distinct users active in [start, end).
+        """
+        return self.window(start, end).count()
+
+    def estimate_churn(self, start, end, later_start, later_end):
+        """
+        Estimated users active in [start, end) but not in [later_start, later_end).
+        """
+        earlier = self.window(start, end)
+        later = self.window(later_start, later_end)
+        both = HyperLogLog.union([earlier, later], self.precision)
+        return max(0, both.count() - later.count())
+
+    def prune(self, today=None):
+        """
+        Drops days older than the retention window.
+        """
+        cutoff = self._day(today) - datetime.timedelta(days=self.retention_days)
+        for day in [day for day in self.days if day < cutoff]:
+            del self.days[day]
+
+    def memory_bytes(self):
+        return sum(len(sketch.registers) for sketch in self.days.values())
@@ -0,0 +1,126 @@
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+
+def _to_timestamp(when):
+    if when is None:
+        return datetime.datetime.now().timestamp()
+    if isinstance(when, datetime.datetime):
+        return when.timestamp()
+    return float(when)
+
+
+class ActivityStore:
+    """
+    Compact, time-ordered log of user activity events.
+
+    Events are kept in two parallel arrays sorted by time: float64 timestamps
+    and uint32 indices into an interned user-id table. That is 12 bytes per
+    event instead of a dict per user. Window queries binary-search the
+    timestamps, so they cost O(log n + k) for k events in the window.
+    """
+
+    def __init__(self):
+        self._timestamps = array('d')
+        self._users = array('I')
+        self._ids = []      # interned index -> user id
+        self._index = {}    # user id -> interned index
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def intern(self, user_id):
+        """
+        :return: The compact integer index for `user_id`, assigning one if new.
+        """
+        index = self._index.get(user_id)
+        if index is None:
+            index = len(self._ids)
+            self._ids.append(user_id)
+            self._index[user_id] = index
+        return index
+
+    def record(self, user_id, when=None):
+        """
+        Records one activity event. Appending in time order is O(1); a late event is inserted in place.
+        :param user_id: User identifier.
+        :param when: datetime, epoch seconds, or None for now.
+        """
+        timestamp = _to_timestamp(when)
+        user = self.intern(user_id)
+        if not self._timestamps or timestamp >= self._timestamps[-1]:
+            self._timestamps.append(timestamp)
+            self._users.append(user)
+        else:
+            position = bisect_right(self._timestamps, timestamp)
+            self._timestamps.insert(position, timestamp)
+            self._users.insert(position, user)
+
+    def record_many(self, events):
+        """
+        Records many (user_id, when) events, re-sorting once at the end instead of per event.
+        New events that are all later than the stored ones are appended without re-sorting the store.
+        """
+        start = len(self._timestamps)
+        last = self._timestamps[-1] if start else None
+        for user_id, when in events:
+            self._timestamps.append(_to_timestamp(when))
+            self._users.append(self.intern(user_id))
+        if last is not None and min(self._timestamps[start:], default=last) >= last:
+            order = sorted(range(start, len(self._timestamps)), key=self._timestamps.__getitem__)
+            self._timestamps[start:] = array('d', (self._timestamps[i] for i in order))
+            self._users[start:] = array('I', (self._users[i] for i in order))
+            return
+        order = sorted(range(len(self._timestamps)), key=self._timestamps.__getitem__)
+        self._timestamps = array('d', (self._timestamps[i] for i in order))
+        self._users = array('I', (self._users[i] for i in order))
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a store from dicts with "user_id" and "last_active", like USER_ACTIVITY.
+        """
+        store = cls()
+        store.record_many((record["user_id"], record["last_active"]) for record in records)
+        return store
+
+    def _window(self, start, end):
+        lo = 0 if start is None else bisect_left(self._timestamps, _to_timestamp(start))
+        hi = len(self._timestamps) if end is None else bisect_left(self._timestamps, _to_timestamp(end))
+        return set(self._users[lo:hi])
+
+    def users_between(self, start, end):
+        """
+        Users with at least one event in [start, end).
+        :param start: datetime / epoch seconds, or None for the beginning.
+        :param end: datetime / epoch seconds, or None for no upper bound.
+        :return: List of user IDs.
+        """
+        return [self._ids[index] for index in self._window(start, end)]
+
+    def users_since(self, cutoff):
+        """
+        Users with at least one event at or after `cutoff`.
+        """
+        return self.users_between(cutoff, None)
+
+    def users_active_in_not_in(self, start, end, later_start, later_end):
+        """
+        Users active in [start, end) but not in [later_start, later_end).
+        The difference is taken on interned indices, before any IDs are materialized.
+        :return: List of user IDs.
+        """
+        churned = self._window(start, end) - self._window(later_start, later_end)
+        return [self._ids[index] for index in churned]
+
+    def compact(self):
+        """
+        Keeps only each user's latest event, the minimum needed for last-active queries.
+        """
+        latest = {}
+        for timestamp, user in zip(self._timestamps, self._users):
+            latest[user] = timestamp
+        events = sorted((timestamp, user) for user, timestamp in latest.items())
+        self._timestamps = array('d', (timestamp for timestamp, _ in events))
+        self._users = array('I', (user for _, user in events))
@@ -0,0 +1,141 @@
+import datetime
+import json
+
+from web3 import Web3
+import ipfshttpclient
+
+import activity_codec
+from activity_log import ActivityLogReader
+from activity_store import ActivityStore
+from snapshot import SnapshotChain
+from tx_submitter import TransactionSubmitter
+
+
+class ActivityUploader:
+    """
+    Shared part of the active-user uploaders in active_users_to_dapp.py and m_active_users_to_dapp.py.
+
+    - Activity comes from an ActivityStore (plus optional DailyActivitySketches),
+      or is loaded incrementally from the bot's event log.
+    - Reports are uploaded to IPFS as JSON or in the compact chunked encoding,
+      and their CID is recorded on-chain through a TransactionSubmitter.
+    - upload_snapshot() publishes a report as a delta linked to the previous
+      snapshot, and only moves the local head once the contract recorded it.
+    """
+
+    def __init__(self, rpc_url, contract_address, contract_abi, ipfs_url, activity_store, activity_sketches=None,
+                 activity_log=None, snapshot_state="active_users_snapshot.json", fee_oracle=None):
+        """
+        :param rpc_url: Ethereum node RPC URL.
+        :param contract_address: Address of the smart contract.
+        :param contract_abi: ABI of the smart contract.
+        :param ipfs_url: URL for the IPFS client.
+        :param activity_store: ActivityStore to query.
+        :param activity_sketches: DailyActivitySketches kept next to the store, or None.
+        :param activity_log: Directory of the bot's ActivityEventLog (or an ActivityLogReader); when given,
+                             activity is read from it, read-only.
+        :param snapshot_state: Local file tracking the latest incremental snapshot.
+        :param fee_oracle: FeeOracle shared with the bot's other submitters on this chain.
+        """
+        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+        self.contract = self.web3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=contract_abi)
+        self.ipfs = ipfshttpclient.connect(ipfs_url)
+        self.submitter = TransactionSubmitter(self.web3, fee_oracle=fee_oracle)
+        self.snapshots = SnapshotChain(self.ipfs, snapshot_state)
+        self.activity = activity_store
+        self.sketches = activity_sketches
+        # A second ActivityEventLog on the bot's directory would be another writer: only ever read it
+        self.activity_log = ActivityLogReader(activity_log) if isinstance(activity_log, str) else activity_log
+        self._activity_until = None   # newest event timestamp loaded from the log
+        if activity_log is not None:
+            self.refresh_activity()
+
+    def refresh_activity(self):
+        """
+        Loads the events appended to the bot's event log since the last refresh (all of them the first time)
+        into the store, and the sketches if there are any.
+        """
+        if self._activity_until is None:
+            self.activity = ActivityStore()
+            if self.sketches is not None:
+                self.sketches = type(self.sketches)(self.sketches.precision, self.sketches.retention_days)
+        events = list(self.activity_log.iter_events(since=self._activity_until))
+        if events:
+            self._activity_until = max(timestamp for timestamp, _ in events)
+        self.activity.record_many((user_id, timestamp) for timestamp, user_id in events)
+        if self.sketches is not None:
+            for timestamp, user_id in events:
+                self.sketches.record(user_id, timestamp)
+
+    def collect_active_users(self, days):
+        """
+        Filters users active within the last `days` days.
+        :param days: Number of days to consider for activity.
+        :return: List of active user IDs.
+        """
+        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
+        return self.activity.users_since(cutoff_date)
+
+    def upload_to_ipfs(self, data, encoding="json", chunk_size=activity_codec.DEFAULT_CHUNK_SIZE):
+        """
+        Uploads data to IPFS.
+        :param data: Data to upload.
+        :param encoding: "json", or "compact" for sorted delta-varint ids, zlib-compressed and
+                         streamed in chunks under a manifest (read back with activity_codec.download).
+        :param chunk_size: Maximum bytes per chunk in "compact" encoding.
+        :return: IPFS hash (of the manifest in "compact" encoding).
+        """
+        if encoding == "compact":
+            return activity_codec.upload(self.ipfs, data, chunk_size=chunk_size)
+        if encoding != "json":
+            raise ValueError("Invalid encoding. Choose 'json' or 'compact'.")
+        json_data = json.dumps(data)
+        result = self.ipfs.add_str(json_data)
+        return result
+
+    def upload_to_smart_contract(self, ipfs_hash, sender_address, private_key, wait=True, urgency="medium"):
+        """
+        Calls the smart contract to upload metadata.
+        :param ipfs_hash: IPFS hash of the uploaded data.
+        :param sender_address: Ethereum address of the sender.
+        :param private_key: Private key of the sender.
+        :param wait: Block until mined. Pass False to keep sending and collect receipts later.
+        :param urgency: Fee level, "low", "medium" or "high".
+        :return: Transaction receipt, or a PendingTransaction if `wait` is False.
+        """
+        pending = self.submitter.submit(self.contract.functions.storeData(ipfs_hash), sender_address, private_key,
+                                        urgency=urgency)
+        return pending.result() if wait else pending
+
+    def upload_snapshot(self, data, sender_address, private_key, wait=True, urgency="medium"):
+        """
+        Uploads `data` as an incremental snapshot (a delta linked to the previous CID) and records it on-chain.
+        If the data is unchanged since the last snapshot, neither IPFS nor the contract is called.
+        :param data: Dictionary of user ID lists and values, as passed to upload_to_ipfs.
+        :return: (cid, receipt); receipt is None when nothing changed (a PendingTransaction if `wait` is False).
+        """
+        prepared = self.snapshots.prepare(data)
+        if prepared is None:
+            print(f"Activity unchanged since snapshot {self.snapshots.head}, skipping upload")
+            return self.snapshots.head, None
+        pending = self.upload_to_smart_contract(prepared.cid, sender_address, private_key, wait=False,
+                                                urgency=urgency)
+        # The local head only moves once the contract points at the new snapshot
+        if not wait:
+            pending.future.add_done_callback(lambda future: self._commit_snapshot(prepared, future))
+            return prepared.cid, pending
+        self._commit_snapshot(prepared, pending.future)
+        return prepared.cid, pending.result()
+
+    def _commit_snapshot(self, prepared, future):
+        if future.exception() is None and future.result()["status"] == 1:
+            self.snapshots.commit(prepared)
+        else:
+            print(f"Snapshot {prepared.cid} was not recorded on-chain, it will be published again next run")
+
+    def load_snapshot(self, cid=None):
+        """
+        Rebuilds the full data of a snapshot from its chain of deltas.
+        :param cid: Snapshot CID (e.g. read from the contract), defaults to the latest local one.
+        """
+        return self.snapshots.load(cid)
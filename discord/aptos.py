@@ -1,4 +1,5 @@
-import requests
+import async_transport
+import transport
 
 class AptosModule:
     def __init__(self, rpc_url):
@@ -15,7 +16,7 @@ class AptosModule:
         :return: Account information as a dictionary or an error message.
         """
         endpoint = f"{self.rpc_url}/accounts/{address}"
-        response = requests.get(endpoint)
+        response = transport.get(endpoint)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch account info: {response.status_code}"}
@@ -27,7 +28,7 @@ class AptosModule:
         :return: Transaction details as a dictionary or an error message.
         """
         endpoint = f"{self.rpc_url}/transactions/by_hash/{transaction_hash}"
-        response = requests.get(endpoint)
+        response = transport.get(endpoint)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch transaction: {response.status_code}"}
@@ -38,7 +39,7 @@ class AptosModule:
         :return: Latest ledger info as a dictionary or an error message.
         """
         endpoint = f"{self.rpc_url}"
-        response = requests.get(endpoint)
+        response = transport.get(endpoint)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch latest ledger info: {response.status_code}"}
@@ -50,12 +51,43 @@ class AptosModule:
         :return: Account resources as a dictionary or an error message.
         """
         endpoint = f"{self.rpc_url}/accounts/{address}/resources"
-        response = requests.get(endpoint)
+        response = transport.get(endpoint)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch account resources: {response.status_code}"}
 
 
+
+class AsyncAptosModule:
+    """
+    asyncio version of AptosModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        """
+        Initialize the module with the Aptos RPC URL.
+        :param rpc_url: The URL of the Aptos RPC endpoint.
+        """
+        self.rpc_url = rpc_url
+
+    async def _get(self, endpoint, error_message):
+        response = await async_transport.get(endpoint)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"{error_message}: {response.status_code}"}
+
+    async def get_account_info(self, address):
+        return await self._get(f"{self.rpc_url}/accounts/{address}", "Failed to fetch account info")
+
+    async def get_transaction(self, transaction_hash):
+        return await self._get(f"{self.rpc_url}/transactions/by_hash/{transaction_hash}", "Failed to fetch transaction")
+
+    async def get_latest_ledger_info(self):
+        return await self._get(f"{self.rpc_url}", "Failed to fetch latest ledger info")
+
+    async def get_account_resources(self, address):
+        return await self._get(f"{self.rpc_url}/accounts/{address}/resources", "Failed to fetch account resources")
+
+
 # Example Usage:
 if __name__ == "__main__":
     # Replace with your Aptos RPC URL
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from transport import TRANSPORT_CONFIG
+
+_session = None
+_session_loop = None
+_endpoint_limits = {}
+
+
+class AsyncResponse:
+    """
+    Minimal response object so async callers can keep the same
+    `status_code` / `json()` checks as the requests-based modules.
+    """
+    __slots__ = ("status_code", "text")
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _endpoint_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session():
+    """
+    Returns the shared aiohttp session for the running event loop, creating it on first use.
+    Pool sizes and timeouts come from TRANSPORT_CONFIG in transport.py.
+    :return: aiohttp.ClientSession.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=TRANSPORT_CONFIG["async_pool_limit"],
+            keepalive_timeout=60,
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=TRANSPORT_CONFIG["connect_timeout"],
+            sock_read=TRANSPORT_CONFIG["read_timeout"],
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        _session_loop = loop
+        _endpoint_limits.clear()
+    return _session
+
+
+def _endpoint_semaphore(url):
+    key = _endpoint_key(url)
+    semaphore = _endpoint_limits.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(TRANSPORT_CONFIG["endpoint_concurrency"])
+        _endpoint_limits[key] = semaphore
+    return semaphore
+
+
+async def request(method, url, **kwargs):
+    """
+    Sends a request over the shared session, limited per endpoint and retried
+    with exponential backoff on connection errors and retryable status codes.
+    :param method: HTTP method.
+    :param url: Target URL.
+    :param kwargs: Extra arguments for aiohttp (json, params, headers, ...).
+    :return: AsyncResponse.
+    """
+    session = get_session()
+    semaphore = _endpoint_semaphore(url)
+    attempts = TRANSPORT_CONFIG["max_retries"] + 1
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            async with semaphore:
+                async with session.request(method, url, **kwargs) as response:
+                    text = await response.text()
+                    retry_after = response.headers.get("Retry-After")
+            if response.status not in TRANSPORT_CONFIG["retry_statuses"] or last_attempt:
+                return AsyncResponse(response.status, text)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if last_attempt:
+                raise
+            retry_after = None
+
+        delay = TRANSPORT_CONFIG["backoff_factor"] * (2 ** attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        await asyncio.sleep(delay)
+
+
+async def post(url, **kwargs):
+    """
+    Sends a POST request over the shared async pool.
+    """
+    return await request("POST", url, **kwargs)
+
+
+async def get(url, **kwargs):
+    """
+    Sends a GET request over the shared async pool.
+    """
+    return await request("GET", url, **kwargs)
+
+
+async def close_async_transport():
+    """
+    Closes the shared session and its pooled connections.
+    """
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+    _endpoint_limits.clear()
@@ -1,4 +1,5 @@
-import requests
+import async_transport
+import transport
 
 class SolanaModule:
     def __init__(self, rpc_url):
@@ -11,7 +12,7 @@ class SolanaModule:
             "method": "getAccountInfo",
             "params": [pubkey]
         }
-        response = requests.post(self.rpc_url, json=payload)
+        response = transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch account info: {response.status_code}"}
@@ -23,7 +24,40 @@ class SolanaModule:
             "method": "getBlock",
             "params": [slot]
         }
-        response = requests.post(self.rpc_url, json=payload)
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch block info: {response.status_code}"}
+
+
+
+class AsyncSolanaModule:
+    """
+    asyncio version of SolanaModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        self.rpc_url = rpc_url
+
+    async def get_account_info(self, pubkey):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getAccountInfo",
+            "params": [pubkey]
+        }
+        response = await async_transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch account info: {response.status_code}"}
+
+    async def get_block(self, slot):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getBlock",
+            "params": [slot]
+        }
+        response = await async_transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch block info: {response.status_code}"}
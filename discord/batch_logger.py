@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import merkle
+
+
+class BatchedConversationLogger:
+    """
+    Write-behind logger for bot conversations.
+
+    Messages are buffered and flushed as one batch when the buffer reaches
+    `max_batch_size` entries or its oldest entry is `max_batch_age` seconds old.
+    Each batch is uploaded to IPFS as a single JSON blob and only its CID and
+    Merkle root are committed on-chain, so gas is paid once per batch instead
+    of once per message.
+
+    A batch holds at most `max_batch_size` messages. When a flush fails its
+    messages go back to the buffer and flush_if_due() waits with exponential
+    backoff before trying again. While IPFS or the chain stays down the buffer
+    is capped at `max_buffered` messages; the oldest beyond that are dropped
+    and counted.
+    """
+
+    def __init__(self, ipfs, commit_batch, max_batch_size=256, max_batch_age=60.0, cached_batches=128,
+                 retry_backoff=5.0, max_retry_backoff=300.0, max_buffered=None):
+        """
+        :param ipfs: ipfshttpclient client used to store batch blobs.
+        :param commit_batch: Callable(cid, merkle_root_hex, count) that records the batch on-chain.
+        :param max_batch_size: Flush once this many messages are buffered; also the largest batch committed.
+        :param max_batch_age: Flush once the oldest buffered message is this many seconds old.
+        :param cached_batches: Number of recent batch trees kept in memory for proofs.
+        :param retry_backoff: Seconds flush_if_due() waits after a failed flush, doubled per consecutive failure.
+        :param max_retry_backoff: Longest wait between flush attempts.
+        :param max_buffered: Most messages kept while flushes fail, defaults to 16 batches.
+        """
+        self.ipfs = ipfs
+        self.commit_batch = commit_batch
+        self.max_batch_size = max_batch_size
+        self.max_batch_age = max_batch_age
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.max_buffered = max_buffered or 16 * max_batch_size
+        self._buffer = []
+        self._oldest = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.counters = {"batches": 0, "flush_errors": 0, "dropped": 0}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # cid -> tree levels of recent batches, so their proofs skip rebuilding the tree
+        self.batches = OrderedDict()
+        self.cached_batches = cached_batches
+
+    def add(self, author_id, content, reply):
+        """
+        Buffers one exchange and flushes if the size or age limit is reached.
+        :return: The flushed batch record, or None if nothing was flushed.
+        """
+        entry = {
+            "author_id": str(author_id),
+            "content": content,
+            "reply": reply,
+            "timestamp": time.time(),
+        }
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(entry)
+            self._trim()
+        return self.flush_if_due()
+
+    def _trim(self):
+        # Called with self._lock held
+        overflow = len(self._buffer) - self.max_buffered
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.counters["dropped"] += overflow
+            print(f"Conversation log buffer full, dropped the {overflow} oldest messages")
+
+    def flush_if_due(self):
+        """
+        Flushes the buffer if it is full or too old. Safe to call from a timer.
+        After a failed flush, nothing is attempted until the retry backoff has passed.
+        :return: The flushed batch record, or None.
+        """
+        with self._lock:
+            due = self._buffer and time.monotonic() >= self._retry_at and (
+                len(self._buffer) >= self.max_batch_size
+                or time.monotonic() - self._oldest >= self.max_batch_age
+            )
+        return self.flush() if due else None
+
+    def flush(self):
+        """
+        Uploads up to `max_batch_size` buffered messages as one blob and commits its CID and Merkle root.
+        A failed upload or commit puts the messages back in the buffer, is counted in
+        counters["flush_errors"] and returns None; the next attempt waits for the retry backoff.
+        :return: Batch record {"cid", "root", "count", "receipt"}, or None if the buffer was empty or the flush failed.
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer[:self.max_batch_size], self._buffer[self.max_batch_size:]
+                self._oldest = time.monotonic() if self._buffer else None
+            if not entries:
+                return None
+
+            levels = merkle.build_levels([merkle.hash_leaf(entry) for entry in entries])
+            root = "0x" + levels[-1][0].hex()
+            blob = json.dumps({"version": 1, "merkle_root": root, "entries": entries},
+                              sort_keys=True, separators=(",", ":"))
+            try:
+                cid = self.ipfs.add_str(blob)
+                receipt = self.commit_batch(cid, root, len(entries))
+            except Exception as e:
+                # Put the entries back in front and back off before the next attempt
+                with self._lock:
+                    self._buffer[:0] = entries
+                    self._oldest = time.monotonic()
+                    self._trim()
+                    self._failures += 1
+                    self._retry_at = time.monotonic() + min(self.retry_backoff * 2 ** (self._failures - 1),
+                                                            self.max_retry_backoff)
+                    self.counters["flush_errors"] += 1
+                print(f"Conversation log flush of {len(entries)} messages failed, will retry: {e}")
+                return None
+
+            with self._lock:
+                self._failures = 0
+                self._retry_at = 0.0
+                self.counters["batches"] += 1
+            self._remember(cid, levels)
+            return {"cid": cid, "root": root, "count": len(entries), "receipt": receipt}
+
+    def _remember(self, cid, levels):
+        with self._lock:
+            self.batches[cid] = levels
+            self.batches.move_to_end(cid)
+            while len(self.batches) > self.cached_batches:
+                self.batches.popitem(last=False)
+
+    def load_batch(self, cid):
+        """
+        Fetches a committed batch blob from IPFS.
+        :param cid: CID recorded on-chain.
+        :return: Decoded blob with "merkle_root" and "entries".
+        """
+        return json.loads(self.ipfs.cat(cid))
+
+    def get_proof(self, cid, index):
+        """
+        Builds an inclusion proof for message `index` of batch `cid`.
+        :param cid: CID of the batch.
+        :param index: Position of the message inside the batch.
+        :return: {"entry", "proof", "root"} ready for merkle.verify_proof.
+        """
+        blob = self.load_batch(cid)
+        with self._lock:
+            levels = self.batches.get(cid)
+        if levels is None:
+            levels = merkle.build_levels([merkle.hash_leaf(entry) for entry in blob["entries"]])
+            self._remember(cid, levels)
+        return {
+            "entry": blob["entries"][index],
+            "proof": merkle.merkle_proof(levels, index),
+            "root": "0x" + levels[-1][0].hex(),
+        }
+
+    @staticmethod
+    def verify(entry, proof, onchain_root):
+        """
+        Verifies that a single message was part of a committed batch.
+        :param entry: The message entry as stored in the batch blob.
+        :param proof: Proof from get_proof.
+        :param onchain_root: Merkle root read from the contract.
+        :return: True if the message is in the batch.
+        """
+        return merkle.verify_proof(entry, proof, onchain_root)
+
+    def pending(self):
+        """
+        :return: Number of buffered messages not yet committed.
+        """
+        with self._lock:
+            return len(self._buffer)
@@ -0,0 +1,215 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Blocks this far below the chain head are treated as final and never refetched.
+# Solana's head is read with the "finalized" commitment, so it needs no extra depth.
+FINALITY_DEPTH = {
+    "ethereum": 64,
+    "nethermind": 64,
+    "solana": 0,
+}
+
+
+def eth_block_number(block):
+    """Block number of an eth_getBlockByNumber result."""
+    return int(block["number"], 16)
+
+
+def eth_transaction_block_number(tx):
+    """Block number of an eth_getTransactionByHash result, None while pending."""
+    return int(tx["blockNumber"], 16) if tx.get("blockNumber") else None
+
+
+class FinalizedBlockCache:
+    """
+    Two-tier cache for finalized blocks and transactions.
+
+    Tier 1 is an in-memory LRU bounded by a byte budget (measured on the JSON
+    encoding). Tier 2 is a SQLite file that survives restarts. Only data at or
+    below the finality depth is stored, so entries never need invalidation.
+    """
+
+    def __init__(self, chain, path=None, memory_budget=64 * 1024 * 1024, finality_depth=None,
+                 head_fn=None, head_ttl=6.0):
+        """
+        :param chain: Chain name, used for the default finality depth and file name.
+        :param path: SQLite file path, defaults to "<chain>_finalized.sqlite".
+        :param memory_budget: Bytes of JSON kept in the in-memory tier.
+        :param finality_depth: Overrides FINALITY_DEPTH[chain].
+        :param head_fn: Callable returning the current head block number / slot.
+        :param head_ttl: Seconds the head number is reused before head_fn is called again.
+        """
+        self.chain = chain
+        self.finality_depth = FINALITY_DEPTH.get(chain, 64) if finality_depth is None else finality_depth
+        self.memory_budget = memory_budget
+        self.head_fn = head_fn
+        self.head_ttl = head_ttl
+        self._head = None
+        self._head_at = 0.0
+        self._memory = OrderedDict()   # (kind, key) -> (value, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or f"{chain}_finalized.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS finalized ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (kind, key)) WITHOUT ROWID"
+        )
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def finalized_head(self):
+        """
+        Highest block number considered final, refreshing the head at most every `head_ttl` seconds.
+        :return: Block number, or None if no head function is set.
+        """
+        if self.head_fn is None:
+            return None
+        now = time.monotonic()
+        if self._head is None or now - self._head_at >= self.head_ttl:
+            self._head = self.head_fn()
+            self._head_at = now
+        return self._head - self.finality_depth
+
+    def is_final(self, number):
+        """
+        :param number: Block number or slot.
+        :return: True if the block can be cached permanently.
+        """
+        if number is None:
+            return False
+        # Avoid a head lookup when an older head already proves finality.
+        if self._head is not None and number <= self._head - self.finality_depth:
+            return True
+        head = self.finalized_head()
+        return head is not None and number <= head
+
+    def get(self, kind, key):
+        """
+        Looks up a cached value in memory, then on disk.
+        :param kind: "block" or "transaction".
+        :param key: Block number, slot or hash.
+        :return: Cached value or None.
+        """
+        cache_key = (kind, str(key))
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                self._memory.move_to_end(cache_key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+            row = self._db.execute(
+                "SELECT data FROM finalized WHERE kind = ? AND key = ?", cache_key
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            encoded = zlib.decompress(row[0])
+            value = json.loads(encoded)
+            self._remember(cache_key, value, len(encoded))
+            return value
+
+    def put(self, kind, key, value):
+        """
+        Stores one finalized value in both tiers.
+        """
+        self.put_many(kind, [(key, value)])
+
+    def put_many(self, kind, items):
+        """
+        Stores many finalized values in both tiers with a single disk transaction.
+        :param kind: "block" or "transaction".
+        :param items: Iterable of (key, value) pairs.
+        """
+        rows = []
+        with self._lock:
+            for key, value in items:
+                encoded = json.dumps(value, separators=(",", ":")).encode("utf-8")
+                cache_key = (kind, str(key))
+                rows.append((cache_key[0], cache_key[1], zlib.compress(encoded)))
+                self._remember(cache_key, value, len(encoded))
+            if rows:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO finalized (kind, key, data) VALUES (?, ?, ?)", rows)
+                self.counters["stored"] += len(rows)
+
+    def fetch(self, kind, key, fetch, number_of):
+        """
+        Returns a cached JSON-RPC response, or calls `fetch` and caches its result if final.
+        :param kind: "block" or "transaction".
+        :param key: Block number, slot or hash.
+        :param fetch: Callable returning the JSON-RPC response on a miss.
+        :param number_of: Callable(result) -> block number/slot the result belongs to.
+        :return: JSON-RPC response dictionary.
+        """
+        cached = self.get(kind, key)
+        if cached is not None:
+            return {"jsonrpc": "2.0", "id": None, "result": cached}
+        response = fetch()
+        result = response.get("result") if isinstance(response, dict) else None
+        if result and self.is_final(number_of(result)):
+            self.put(kind, key, result)
+        return response
+
+    def fetch_many(self, kind, keys, fetch_many, number_of):
+        """
+        Batch version of fetch: only the keys missing from the cache are passed to `fetch_many`.
+        :param kind: "block" or "transaction".
+        :param keys: Iterable of block numbers, slots or hashes.
+        :param fetch_many: Callable(list of keys) -> list of responses in the same order.
+        :param number_of: Callable(result) -> block number/slot the result belongs to.
+        :return: List of JSON-RPC responses in the same order as `keys`.
+        """
+        keys = list(keys)
+        responses = [None] * len(keys)
+        missing = []
+        for index, key in enumerate(keys):
+            cached = self.get(kind, key)
+            if cached is None:
+                missing.append(index)
+            else:
+                responses[index] = {"jsonrpc": "2.0", "id": None, "result": cached}
+        if missing:
+            final = []
+            for index, response in zip(missing, fetch_many([keys[i] for i in missing])):
+                responses[index] = response
+                result = response.get("result") if isinstance(response, dict) else None
+                if result and self.is_final(number_of(result)):
+                    final.append((keys[index], result))
+            self.put_many(kind, final)
+        return responses
+
+    def _remember(self, cache_key, value, size):
+        if size > self.memory_budget:
+            return
+        previous = self._memory.pop(cache_key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[cache_key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.counters["evicted"] += 1
+
+    def stats(self):
+        """
+        :return: Hit/miss counters, hit rate and memory usage.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,239 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+Turn = namedtuple("Turn", ["author", "prompt", "reply", "tokens"])
+
+# Words and openings that point back at earlier turns ("and its fees?", "what about that one?")
+_FOLLOW_UP = re.compile(
+    r"\b(it|its|it's|this|that|these|those|they|them|their|he|she|him|her|his|above|previous|earlier|"
+    r"again|else|same|you said|what about|how about)\b|^\s*(and|but|so|also|then)\b"
+)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (about four characters per token), good enough for budgeting
+    without loading the model's tokenizer.
+    """
+    return max(1, (len(text) + 3) // 4)
+
+
+def _format_turn(turn):
+    return f"{turn.author}: {turn.prompt}\nAssistant: {turn.reply}"
+
+
+def _trim_to_tokens(text, tokens):
+    # Keep the end: the newest part of a summary matters most
+    limit = tokens * 4
+    return text if len(text) <= limit else "…" + text[-(limit - 1):]
+
+
+def refers_back(prompt):
+    """
+    Heuristic: True if `prompt` probably depends on earlier turns (pronouns, "what about ...",
+    or too short to stand on its own, like "why?"). False positives only cost a cache miss.
+    """
+    text = prompt.casefold()
+    return len(text.split()) < 3 or bool(_FOLLOW_UP.search(text))
+
+
+def extractive_summary(summary, turns, max_chars=160):
+    """
+    Default summarizer that needs no model call: the previous summary plus one shortened line per turn.
+    """
+    lines = [summary] if summary else []
+    for turn in turns:
+        prompt = turn.prompt if len(turn.prompt) <= max_chars else turn.prompt[:max_chars - 1] + "…"
+        reply = turn.reply if len(turn.reply) <= max_chars else turn.reply[:max_chars - 1] + "…"
+        lines.append(f"{turn.author} asked: {prompt} / answered: {reply}")
+    return "\n".join(lines)
+
+
+class _Channel:
+    __slots__ = ("turns", "tokens", "summary", "summary_tokens", "pending", "last_used", "fold_lock")
+
+    def __init__(self, max_turns):
+        self.turns = deque(maxlen=max_turns)
+        self.tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.pending = deque()   # batches of folded turns waiting for the summarizer, oldest first
+        self.last_used = time.monotonic()
+        self.fold_lock = threading.Lock()
+
+
+class ConversationMemory:
+    """
+    Per-channel conversation memory for the reply prompts, with a bounded size.
+
+    Each channel keeps its recent turns in a ring buffer. While the turns fit in
+    `history_budget` tokens, they go into the prompt verbatim. When they no
+    longer fit, the oldest turns are folded into a running summary (capped at
+    `summary_budget` tokens) until the rest fits in half the budget, so the
+    summarizer runs once per several turns rather than on every message. A
+    prompt therefore never carries more than summary_budget + history_budget
+    tokens of context, and that is also the hard cap on memory per channel.
+
+    Folded turns stay visible until their summary is ready: build_prompt adds
+    them to the summary section in short extractive form meanwhile. Folds of
+    one channel are summarized strictly in the order they were made.
+
+    Channels idle for `idle_ttl` seconds are evicted, as are the least recently
+    used channels beyond `max_channels`.
+    """
+
+    def __init__(self, history_budget=1500, summary_budget=300, max_turns=50, idle_ttl=3600.0,
+                 max_channels=1000, summarize=None):
+        """
+        :param history_budget: Tokens of verbatim recent turns per prompt.
+        :param summary_budget: Tokens of summary of older turns per prompt.
+        :param max_turns: Ring buffer size per channel.
+        :param idle_ttl: Seconds without activity after which a channel's memory is dropped.
+        :param max_channels: Channels kept at most (least recently used are evicted).
+        :param summarize: Blocking callable(previous_summary, turns) -> new summary, e.g. an LLM call.
+                          Defaults to extractive_summary. Runs on the caller's thread.
+        """
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_channels = max_channels
+        self.summarize = summarize or extractive_summary
+        self._channels = OrderedDict()   # channel id -> _Channel, least recently used first
+        self._lock = threading.Lock()
+        self.counters = {"turns": 0, "summarized_turns": 0, "summaries": 0, "summary_errors": 0,
+                         "evicted_idle": 0, "evicted_lru": 0}
+
+    def _channel(self, channel_id, create):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            if not create:
+                return None
+            channel = self._channels[channel_id] = _Channel(self.max_turns)
+        self._channels.move_to_end(channel_id)
+        channel.last_used = time.monotonic()
+        return channel
+
+    def build_prompt(self, channel_id, author, prompt):
+        """
+        :return: (full prompt, follow_up). The full prompt is `prompt` preceded by the channel's summary
+                 and the recent turns that fit the budget. follow_up is True when the channel has context
+                 and `prompt` seems to refer back to it (see refers_back), so its reply should not be cached.
+        """
+        with self._lock:
+            self._evict()
+            channel = self._channel(channel_id, create=False)
+            if channel is None or not (channel.turns or channel.summary or channel.pending):
+                return prompt, False
+            summary = channel.summary
+            if channel.pending:
+                # Turns still being summarized: keep them in context, briefly
+                summary = _trim_to_tokens(
+                    extractive_summary(summary, [turn for batch in channel.pending for turn in batch]),
+                    self.summary_budget
+                )
+            # Newest turns first until the budget (minus the new prompt) is spent
+            budget = self.history_budget - estimate_tokens(prompt)
+            selected = []
+            for turn in reversed(channel.turns):
+                if turn.tokens > budget:
+                    break
+                selected.append(turn)
+                budget -= turn.tokens
+        sections = []
+        if summary:
+            sections.append(f"Summary of the earlier conversation in this channel:\n{summary}")
+        if selected:
+            sections.append("Recent conversation:\n" + "\n\n".join(_format_turn(turn) for turn in reversed(selected)))
+        sections.append(f"{author}: {prompt}")
+        return "\n\n".join(sections), refers_back(prompt)
+
+    def add_turn(self, channel_id, author, prompt, reply):
+        """
+        Records a question and the bot's reply, summarizing older turns when the budget is exceeded.
+        """
+        turn = Turn(author, prompt, reply, estimate_tokens(_format_turn(Turn(author, prompt, reply, 0))))
+        with self._lock:
+            channel = self._channel(channel_id, create=True)
+            folded = []
+            if len(channel.turns) == channel.turns.maxlen:
+                # The ring buffer would overwrite its oldest turn: fold the older half into the summary instead
+                while len(channel.turns) > channel.turns.maxlen // 2:
+                    oldest = channel.turns.popleft()
+                    channel.tokens -= oldest.tokens
+                    folded.append(oldest)
+            channel.turns.append(turn)
+            channel.tokens += turn.tokens
+            self.counters["turns"] += 1
+            if channel.tokens > self.history_budget:
+                while channel.turns and channel.tokens > self.history_budget // 2:
+                    oldest = channel.turns.popleft()
+                    channel.tokens -= oldest.tokens
+                    folded.append(oldest)
+            if folded:
+                channel.pending.append(folded)
+            self._evict()
+        if folded:
+            self._fold(channel)
+
+    def _fold(self, channel):
+        # The summarizer may be a slow model call: only this channel's folds wait for each other.
+        # Whoever holds fold_lock drains the pending batches oldest first, so summaries stay in order.
+        with channel.fold_lock:
+            while True:
+                with self._lock:
+                    if not channel.pending:
+                        return
+                    turns, previous = channel.pending[0], channel.summary
+                try:
+                    summary = self.summarize(previous, turns)
+                except Exception as e:
+                    self.counters["summary_errors"] += 1
+                    print(f"Conversation summary error: {e}")
+                    summary = extractive_summary(previous, turns)
+                summary = _trim_to_tokens(summary.strip(), self.summary_budget)
+                with self._lock:
+                    channel.summary = summary
+                    channel.summary_tokens = estimate_tokens(summary) if summary else 0
+                    channel.pending.popleft()
+                    self.counters["summaries"] += 1
+                    self.counters["summarized_turns"] += len(turns)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._channels:
+            channel_id, channel = next(iter(self._channels.items()))
+            if channel.last_used < cutoff:
+                self.counters["evicted_idle"] += 1
+            elif len(self._channels) > self.max_channels:
+                self.counters["evicted_lru"] += 1
+            else:
+                break
+            del self._channels[channel_id]
+
+    def forget(self, channel_id):
+        """
+        Drops one channel's memory.
+        """
+        with self._lock:
+            self._channels.pop(channel_id, None)
+
+    def stats(self):
+        """
+        :return: Channel count, tokens held and counters.
+        """
+        with self._lock:
+            tokens = sum(channel.tokens + channel.summary_tokens for channel in self._channels.values())
+            return {"channels": len(self._channels), "tokens": tokens, **self.counters}
+
+
+# Example Usage:
+if __name__ == "__main__":
+    memory = ConversationMemory(history_budget=60, summary_budget=40)
+    for i in range(6):
+        question = f"Question {i} about staking on Solana?"
+        print(memory.build_prompt(1, "alice", question)[0], end="\n---\n")
+        memory.add_turn(1, "alice", question, f"Answer {i}: stake with a validator and earn rewards.")
+    print(memory.stats())
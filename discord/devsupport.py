@@ -1,2 +1,301 @@
 #custom ai model trained on seprate whitepaper data
-#only focused on individual whitepaper
\ No newline at end of file
+#only focused on individual whitepaper
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[._-][a-z0-9]+)*")
+INDEX_FILES = ("postings_ptr", "postings_chunk", "postings_weight", "idf", "chunk_doc", "text_offsets")
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens; keeps terms like "erc-20" or "v1.2" together.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def chunk_text(text, chunk_words=200, overlap=40):
+    """
+    Splits a document into overlapping windows of about `chunk_words` words,
+    so a passage that straddles a boundary is still found whole in one chunk.
+    :return: List of chunk strings.
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def hashed_terms(text, n_features):
+    """
+    Term counts of unigrams and bigrams, hashed into `n_features` buckets (the hashing trick,
+    so there is no vocabulary to store or rebuild). crc32 keeps ids stable across processes.
+    :return: Counter of feature id -> count.
+    """
+    tokens = tokenize(text)
+    mask = n_features - 1
+    terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return Counter(zlib.crc32(term.encode()) & mask for term in terms)
+
+
+class WhitepaperIndex:
+    """
+    Local retrieval index over whitepapers, so the dev-support prompt only carries
+    the few chunks relevant to a question instead of whole documents.
+
+    Documents are chunked and vectorized as TF-IDF over hashed unigrams and
+    bigrams. The index is stored column-wise (one posting list of chunk ids and
+    weights per feature) in .npy files that are memory-mapped, so the index
+    opens in milliseconds and a query only touches the posting lists of its
+    own terms.
+
+    Re-indexing is incremental: each document's chunk term counts are cached
+    under its content hash, so only new or changed documents are re-chunked
+    and re-tokenized. The posting lists and IDF weights are then rebuilt from
+    the cached counts with NumPy.
+    """
+
+    def __init__(self, directory="whitepaper_index", n_features=2 ** 20, chunk_words=200, overlap=40):
+        """
+        :param directory: Where the index and the per-document cache are stored.
+        :param n_features: Hash buckets, a power of two.
+        :param chunk_words: Words per chunk.
+        :param overlap: Words shared by consecutive chunks.
+        """
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.directory = directory
+        self.cache_directory = os.path.join(directory, "documents")
+        os.makedirs(self.cache_directory, exist_ok=True)
+        self.n_features = n_features
+        self.chunk_words = chunk_words
+        self.overlap = overlap
+        self.documents = {}   # name -> content hash, in index order
+        self._arrays = None
+        self._texts = None
+        self.load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """
+        Memory-maps the index files written by the last update, if any.
+        """
+        manifest = self._path("manifest.json")
+        if not os.path.exists(manifest):
+            return
+        with open(manifest) as f:
+            data = json.load(f)
+        if data["n_features"] != self.n_features or data["chunk_words"] != self.chunk_words \
+                or data["overlap"] != self.overlap:
+            print("Index was built with different settings, it will be rebuilt on the next update")
+            return
+        self.documents = data["documents"]
+        self._arrays = {name: np.load(self._path(f"{name}.npy"), mmap_mode="r") for name in INDEX_FILES}
+        self._texts = np.memmap(self._path("texts.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(self._path("texts.bin")) else np.zeros(0, dtype=np.uint8)
+
+    def _analyze(self, text):
+        """
+        Chunks one document and caches its term counts as arrays.
+        """
+        chunks = chunk_text(text, self.chunk_words, self.overlap)
+        rows, features, counts = [], [], []
+        for row, chunk in enumerate(chunks):
+            terms = hashed_terms(chunk, self.n_features)
+            rows.extend([row] * len(terms))
+            features.extend(terms.keys())
+            counts.extend(terms.values())
+        encoded = [chunk.encode() for chunk in chunks]
+        return {
+            "rows": np.array(rows, dtype=np.int32),
+            "features": np.array(features, dtype=np.int64),
+            "counts": np.array(counts, dtype=np.float32),
+            "text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "text_lengths": np.array([len(item) for item in encoded], dtype=np.int64),
+        }
+
+    def update(self, documents, remove_missing=True):
+        """
+        Brings the index up to date with `documents`, re-analyzing only what changed.
+        :param documents: Dictionary of document name -> text.
+        :param remove_missing: Drop indexed documents that are not in `documents`.
+        :return: Dictionary with lists of "added", "updated", "unchanged" and "removed" names.
+        """
+        report = {"added": [], "updated": [], "unchanged": [], "removed": []}
+        current = {} if remove_missing else dict(self.documents)
+        for name, text in documents.items():
+            digest = hashlib.sha256(text.encode()).hexdigest()
+            previous = self.documents.get(name)
+            cache_file = os.path.join(self.cache_directory, f"{digest}.npz")
+            if previous == digest and os.path.exists(cache_file):
+                report["unchanged"].append(name)
+            else:
+                report["added" if previous is None else "updated"].append(name)
+                if not os.path.exists(cache_file):
+                    np.savez(cache_file, **self._analyze(text))
+            current[name] = digest
+        report["removed"] = [name for name in self.documents if name not in current]
+        if report["added"] or report["updated"] or report["removed"] or self._arrays is None:
+            self._rebuild(current)
+        return report
+
+    def update_directory(self, path, extensions=(".md", ".txt")):
+        """
+        Indexes every text / markdown file under `path` (names are relative paths).
+        """
+        documents = {}
+        for root, _, files in os.walk(path):
+            for file in sorted(files):
+                if file.endswith(extensions):
+                    full_path = os.path.join(root, file)
+                    with open(full_path, encoding="utf-8") as f:
+                        documents[os.path.relpath(full_path, path)] = f.read()
+        return self.update(documents)
+
+    def _rebuild(self, documents):
+        rows, features, counts, texts, lengths, chunk_doc = [], [], [], [], [], []
+        offset = 0
+        for doc_id, digest in enumerate(documents.values()):
+            with np.load(os.path.join(self.cache_directory, f"{digest}.npz")) as cached:
+                rows.append(cached["rows"] + offset)
+                features.append(cached["features"])
+                counts.append(cached["counts"])
+                texts.append(cached["text"])
+                lengths.append(cached["text_lengths"])
+                chunk_doc.append(np.full(len(cached["text_lengths"]), doc_id, dtype=np.int32))
+                offset += len(cached["text_lengths"])
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        features = np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+        counts = np.concatenate(counts) if counts else np.zeros(0, dtype=np.float32)
+        lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+
+        # Sublinear TF x smoothed IDF, each chunk vector L2-normalized (dot product = cosine)
+        df = np.bincount(features, minlength=self.n_features)
+        idf = (np.log((1 + offset) / (1 + df)) + 1).astype(np.float32)
+        weights = (1 + np.log(counts)) * idf[features]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=offset)).astype(np.float32)
+        weights = weights / norms[rows]
+
+        order = np.lexsort((rows, features))
+        arrays = {
+            "postings_ptr": np.concatenate(([0], np.cumsum(df))).astype(np.int64),
+            "postings_chunk": rows[order].astype(np.int32),
+            "postings_weight": weights[order].astype(np.float32),
+            "idf": idf,
+            "chunk_doc": np.concatenate(chunk_doc) if chunk_doc else np.zeros(0, dtype=np.int32),
+            "text_offsets": np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+        }
+
+        # Write everything next to the live files, then swap them in; the manifest goes last
+        self._arrays = self._texts = None
+        for name, array in arrays.items():
+            np.save(self._path(f"{name}.tmp.npy"), array)
+            os.replace(self._path(f"{name}.tmp.npy"), self._path(f"{name}.npy"))
+        with open(self._path("texts.bin.tmp"), "wb") as f:
+            for text in texts:
+                f.write(text.tobytes())
+        os.replace(self._path("texts.bin.tmp"), self._path("texts.bin"))
+        with open(self._path("manifest.json.tmp"), "w") as f:
+            json.dump({"n_features": self.n_features, "chunk_words": self.chunk_words, "overlap": self.overlap,
+                       "documents": documents}, f)
+        os.replace(self._path("manifest.json.tmp"), self._path("manifest.json"))
+
+        # Drop cached analyses of documents that are no longer indexed
+        live = {f"{digest}.npz" for digest in documents.values()}
+        for file in os.listdir(self.cache_directory):
+            if file not in live:
+                os.remove(os.path.join(self.cache_directory, file))
+        self.load()
+
+    def _chunk_text(self, chunk):
+        offsets = self._arrays["text_offsets"]
+        return self._texts[offsets[chunk]:offsets[chunk + 1]].tobytes().decode()
+
+    def search(self, question, k=5, document=None):
+        """
+        :param question: Natural-language question.
+        :param k: Number of chunks to return.
+        :param document: Only search this document (name as given to update).
+        :return: List of {"document", "score", "text"} dicts, best first.
+        """
+        if self._arrays is None:
+            return []
+        terms = hashed_terms(question, self.n_features)
+        if not terms:
+            return []
+        arrays = self._arrays
+        chunk_count = len(arrays["chunk_doc"])
+        features = np.fromiter(terms.keys(), dtype=np.int64, count=len(terms))
+        query = (1 + np.log(np.fromiter(terms.values(), dtype=np.float32, count=len(terms)))) * arrays["idf"][features]
+        query /= np.linalg.norm(query) or 1.0
+
+        scores = np.zeros(chunk_count, dtype=np.float32)
+        ptr = arrays["postings_ptr"]
+        for feature, weight in zip(features, query):
+            start, end = ptr[feature], ptr[feature + 1]
+            if start != end:
+                # A chunk appears at most once per posting list, so plain fancy-index addition is exact
+                scores[arrays["postings_chunk"][start:end]] += weight * arrays["postings_weight"][start:end]
+
+        names = list(self.documents)
+        if document is not None:
+            if document not in self.documents:
+                return []
+            scores[arrays["chunk_doc"] != names.index(document)] = 0
+
+        k = min(k, chunk_count)
+        top = np.argpartition(-scores, k - 1)[:k] if k < chunk_count else np.arange(chunk_count)
+        top = top[np.argsort(-scores[top])]
+        return [{"document": names[arrays["chunk_doc"][chunk]], "score": round(float(scores[chunk]), 4),
+                 "text": self._chunk_text(chunk)}
+                for chunk in top if scores[chunk] > 0]
+
+    def build_prompt(self, question, k=5, document=None):
+        """
+        Prompt for the dev-support model with only the top-k relevant whitepaper chunks as context.
+        """
+        results = self.search(question, k, document)
+        if not results:
+            return f"Answer the developer's question. No whitepaper excerpt matched it.\n\nQuestion: {question}"
+        context = "\n\n".join(f"[{item['document']}]\n{item['text']}" for item in results)
+        return ("Answer the developer's question using only these whitepaper excerpts. "
+                "Say so if they do not contain the answer.\n\n"
+                f"{context}\n\nQuestion: {question}")
+
+
+def benchmark(index, questions, k=5):
+    """
+    Average search latency over `questions`, in milliseconds.
+    """
+    start = time.perf_counter()
+    for question in questions:
+        index.search(question, k)
+    return round((time.perf_counter() - start) / max(1, len(questions)) * 1000, 3)
+
+
+# Example Usage:
+if __name__ == "__main__":
+    index = WhitepaperIndex("whitepaper_index")
+    # Put the whitepapers (.md / .txt) in ./whitepapers; unchanged files are skipped on later runs
+    print(index.update_directory("whitepapers"))
+
+    question = "How are validator rewards distributed?"
+    for result in index.search(question, k=3):
+        print(f"{result['score']:.3f} {result['document']}: {result['text'][:80]}...")
+    print(f"Average search latency: {benchmark(index, [question] * 100)} ms")
+    prompt = index.build_prompt(question, k=5)   # Send this to the model instead of the whole whitepaper
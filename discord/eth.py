@@ -1,33 +1,136 @@
-import requests
+import async_transport
+import block_cache
+import jsonrpc
+import transport
 
 class EthereumModule:
-    def __init__(self, rpc_url):
+    def __init__(self, rpc_url, cache=None):
+        """
+        :param rpc_url: Ethereum RPC URL.
+        :param cache: Optional block_cache.FinalizedBlockCache; finalized blocks and
+                      transactions are then served from it instead of the RPC.
+        """
         self.rpc_url = rpc_url
+        self.cache = cache
+        if cache is not None and cache.head_fn is None:
+            cache.head_fn = self.get_block_number
+
+    def get_block_number(self):
+        payload = jsonrpc.build_request("eth_blockNumber")
+        response = transport.post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        return int(response.json()["result"], 16)
 
     def get_block(self, block_number):
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "eth_getBlockByNumber",
-            "params": [hex(block_number), True],
-            "id": 1
-        }
-        response = requests.post(self.rpc_url, json=payload)
+        if self.cache is not None:
+            return self.cache.fetch("block", block_number, lambda: self._fetch_block(block_number),
+                                    block_cache.eth_block_number)
+        return self._fetch_block(block_number)
+
+    def _fetch_block(self, block_number):
+        payload = jsonrpc.build_request("eth_getBlockByNumber", [hex(block_number), True])
+        response = transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch block info: {response.status_code}"}
 
     def get_transaction(self, tx_hash):
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "eth_getTransactionByHash",
-            "params": [tx_hash],
-            "id": 1
-        }
-        response = requests.post(self.rpc_url, json=payload)
+        if self.cache is not None:
+            return self.cache.fetch("transaction", tx_hash, lambda: self._fetch_transaction(tx_hash),
+                                    block_cache.eth_transaction_block_number)
+        return self._fetch_transaction(tx_hash)
+
+    def _fetch_transaction(self, tx_hash):
+        payload = jsonrpc.build_request("eth_getTransactionByHash", [tx_hash])
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch transaction info: {response.status_code}"}
+
+    def get_blocks(self, block_numbers, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches many blocks using JSON-RPC batch requests.
+        Finalized blocks already in the cache are not requested again.
+        :param block_numbers: Iterable of block numbers, e.g. range(start, end).
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of responses in the same order as `block_numbers`.
+        """
+        def fetch(numbers):
+            calls = [("eth_getBlockByNumber", [hex(number), True]) for number in numbers]
+            return jsonrpc.send_batch(self.rpc_url, calls, chunk_size)
+
+        if self.cache is not None:
+            return self.cache.fetch_many("block", block_numbers, fetch, block_cache.eth_block_number)
+        return fetch(block_numbers)
+
+    def get_transactions(self, tx_hashes, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches many transactions using JSON-RPC batch requests.
+        Finalized transactions already in the cache are not requested again.
+        :param tx_hashes: Iterable of transaction hashes.
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of responses in the same order as `tx_hashes`.
+        """
+        def fetch(hashes):
+            calls = [("eth_getTransactionByHash", [tx_hash]) for tx_hash in hashes]
+            return jsonrpc.send_batch(self.rpc_url, calls, chunk_size)
+
+        if self.cache is not None:
+            return self.cache.fetch_many("transaction", tx_hashes, fetch, block_cache.eth_transaction_block_number)
+        return fetch(tx_hashes)
+
+    def get_balances(self, addresses, block="latest", chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        """
+        Fetches the balances of many addresses using JSON-RPC batch requests.
+        :param addresses: Iterable of Ethereum addresses.
+        :param block: Block tag or hex block number to read balances at.
+        :param chunk_size: Maximum number of calls per batch request.
+        :return: List of responses (balance in Wei as hex) in the same order as `addresses`.
+        """
+        calls = [("eth_getBalance", [address, block]) for address in addresses]
+        return jsonrpc.send_batch(self.rpc_url, calls, chunk_size)
+
+
+class AsyncEthereumModule:
+    """
+    asyncio version of EthereumModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        self.rpc_url = rpc_url
+
+    async def get_block_number(self):
+        payload = jsonrpc.build_request("eth_blockNumber")
+        response = await async_transport.post(self.rpc_url, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch block number: {response.status_code}")
+        return int(response.json()["result"], 16)
+
+    async def get_block(self, block_number):
+        payload = jsonrpc.build_request("eth_getBlockByNumber", [hex(block_number), True])
+        response = await async_transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch block info: {response.status_code}"}
+
+    async def get_transaction(self, tx_hash):
+        payload = jsonrpc.build_request("eth_getTransactionByHash", [tx_hash])
+        response = await async_transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch transaction info: {response.status_code}"}
 
+    async def get_blocks(self, block_numbers, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getBlockByNumber", [hex(number), True]) for number in block_numbers]
+        return await jsonrpc.send_batch_async(self.rpc_url, calls, chunk_size)
+
+    async def get_transactions(self, tx_hashes, chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes]
+        return await jsonrpc.send_batch_async(self.rpc_url, calls, chunk_size)
+
+    async def get_balances(self, addresses, block="latest", chunk_size=jsonrpc.DEFAULT_BATCH_SIZE):
+        calls = [("eth_getBalance", [address, block]) for address in addresses]
+        return await jsonrpc.send_batch_async(self.rpc_url, calls, chunk_size)
+
 
 # Example Usage:
 if __name__ == "__main__":
@@ -36,3 +139,8 @@ if __name__ == "__main__":
 
     print(eth.get_block(12345678))
     print(eth.get_transaction("0x1234..."))
+
+    # Backfill a range of blocks, 100 calls per HTTP request
+    for block in eth.get_blocks(range(12345600, 12345700)):
+        if "error" in block:
+            print("Failed:", block["id"], block["error"])
@@ -0,0 +1,312 @@
+import json
+import sqlite3
+import threading
+import time
+
+from web3 import Web3
+
+# Contract events to index: event name -> kind and the names of the event arguments used.
+# Adjust the argument names to match your contract's ABI; events missing from the ABI are skipped.
+DEFAULT_EVENTS = {
+    "MessageLogged": {"kind": "message", "user": "authorId", "content": "message", "reply": "reply"},
+    "BatchLogged": {"kind": "batch", "cid": "cid", "count": "count"},
+    "UserPointsStored": {"kind": "points", "user": "userId", "points": "points"},
+    "DataStored": {"kind": "data", "cid": "ipfsHash"},
+}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS events ("
+    " block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,"
+    " event TEXT NOT NULL, user_key TEXT, args TEXT NOT NULL,"
+    " PRIMARY KEY (block_number, log_index)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS events_by_event ON events (event, block_number, log_index)",
+    "CREATE INDEX IF NOT EXISTS events_by_user ON events (event, user_key, block_number, log_index)",
+    "CREATE TABLE IF NOT EXISTS messages ("
+    " block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, position INTEGER NOT NULL,"
+    " author_id TEXT NOT NULL, content TEXT, reply TEXT, timestamp REAL, cid TEXT,"
+    " PRIMARY KEY (block_number, log_index, position)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS messages_by_author ON messages (author_id, block_number, log_index, position)",
+    "CREATE TABLE IF NOT EXISTS points ("
+    " user_key TEXT PRIMARY KEY, points INTEGER NOT NULL, block_number INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS points_by_total ON points (points DESC)",
+    "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID",
+    # BatchLogged events whose batch could not be loaded yet (IPFS timeout, unpinned CID)
+    "CREATE TABLE IF NOT EXISTS pending_batches ("
+    " block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, cid TEXT NOT NULL,"
+    " attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT,"
+    " PRIMARY KEY (block_number, log_index)) WITHOUT ROWID",
+]
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    return str(value)
+
+
+class EventIndexer:
+    """
+    Indexes the bot contract's events into SQLite for fast local queries.
+
+    Logs are read with eth_getLogs in block ranges that adapt: the range is
+    halved when the node rejects a query (too many results or a timeout) and
+    doubled after a query that returned few logs. Only blocks `confirmations`
+    behind the head are indexed, so stored events are not reorged away.
+    Each range is written in one transaction together with the next block to
+    index, so a restart never counts an event twice.
+
+    Points are kept as running totals with an index for top-N queries.
+    Messages are stored per author; BatchLogged events are expanded into
+    their messages when a `load_batch` function (e.g.
+    BatchedConversationLogger.load_batch) is given. A batch that cannot be
+    loaded does not hold up indexing: its event is stored and the CID is
+    queued in pending_batches for backfill_batches() to retry.
+    """
+
+    def __init__(self, web3, contract, path="event_index.sqlite", events=None, start_block=0, confirmations=12,
+                 initial_range=2000, max_range=50_000, target_logs=5000, points_are_deltas=True, load_batch=None):
+        """
+        :param web3: Web3 instance.
+        :param contract: Contract (with ABI) whose events are indexed.
+        :param path: SQLite file path.
+        :param events: Event name -> argument mapping, defaults to DEFAULT_EVENTS.
+        :param start_block: First block to index when the index is empty (e.g. the deployment block).
+        :param confirmations: Blocks behind the head to stay.
+        :param initial_range: Blocks per eth_getLogs query to start with.
+        :param max_range: Upper bound on blocks per query.
+        :param target_logs: Grow the range only while queries return fewer logs than this.
+        :param points_are_deltas: Add each points event to the total (True) or replace the total (False).
+        :param load_batch: Optional callable(cid) -> {"entries": [...]} used to expand BatchLogged events.
+        """
+        self.web3 = web3
+        self.contract = contract
+        self.confirmations = confirmations
+        self.range = initial_range
+        self.max_range = max_range
+        self.target_logs = target_logs
+        self.points_are_deltas = points_are_deltas
+        self.load_batch = load_batch
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        row = self._db.execute("SELECT value FROM state WHERE key = 'next_block'").fetchone()
+        self.next_block = row[0] if row else start_block
+        self.counters = {"queries": 0, "range_splits": 0, "logs": 0, "messages": 0, "batches_deferred": 0,
+                         "batches_backfilled": 0}
+
+        self.events = {}     # topic0 -> (event name, mapping, ContractEvent)
+        for name, mapping in (events or DEFAULT_EVENTS).items():
+            try:
+                event = contract.events[name]()
+            except Exception:
+                print(f"Event {name} is not in the contract ABI, not indexing it")
+                continue
+            signature = f"{name}({','.join(item['type'] for item in event.abi['inputs'])})"
+            self.events[Web3.keccak(text=signature)] = (name, mapping, event)
+
+    def _get_logs(self, from_block, to_block):
+        self.counters["queries"] += 1
+        return self.web3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": self.contract.address,
+            "topics": [list(self.events)],
+        })
+
+    def sync_once(self):
+        """
+        Indexes everything from the last indexed block up to the confirmed head.
+        :return: Number of logs indexed.
+        """
+        safe_head = self.web3.eth.block_number - self.confirmations
+        indexed = 0
+        while self.next_block <= safe_head:
+            to_block = min(safe_head, self.next_block + self.range - 1)
+            try:
+                logs = self._get_logs(self.next_block, to_block)
+            except Exception as e:
+                if self.range == 1:
+                    raise RuntimeError(f"eth_getLogs failed for block {self.next_block}: {e}")
+                # Too many results or too slow: retry a smaller range
+                self.range = max(1, self.range // 2)
+                self.counters["range_splits"] += 1
+                continue
+            self._store(logs, to_block + 1)
+            indexed += len(logs)
+            if len(logs) < self.target_logs // 2:
+                self.range = min(self.max_range, self.range * 2)
+            elif len(logs) > self.target_logs:
+                self.range = max(1, self.range // 2)
+        return indexed
+
+    def _decode(self, log):
+        topic = bytes(log["topics"][0]) if log["topics"] else None
+        entry = self.events.get(topic)
+        if entry is None:
+            return None
+        name, mapping, event = entry
+        return name, mapping, dict(event.process_log(log)["args"])
+
+    def _store(self, logs, next_block):
+        event_rows, message_rows, points, deferred = [], [], {}, []
+        for log in logs:
+            decoded = self._decode(log)
+            if decoded is None:
+                continue
+            name, mapping, args = decoded
+            block_number, log_index = log["blockNumber"], log["logIndex"]
+            user = args.get(mapping.get("user")) if "user" in mapping else None
+            user_key = str(user) if user is not None else None
+            tx_hash = log["transactionHash"]
+            event_rows.append((block_number, log_index, tx_hash.hex() if hasattr(tx_hash, "hex") else tx_hash,
+                               name, user_key, json.dumps(args, default=_json_default)))
+            kind = mapping["kind"]
+            if kind == "points":
+                value = int(args[mapping["points"]])
+                total, _ = points.get(user_key, (0, block_number))
+                points[user_key] = (total + value if self.points_are_deltas else value, block_number)
+            elif kind == "message":
+                message_rows.append((block_number, log_index, 0, user_key, args.get(mapping["content"]),
+                                     args.get(mapping["reply"]), None, None))
+            elif kind == "batch" and self.load_batch is not None:
+                cid = args[mapping["cid"]]
+                try:
+                    message_rows.extend(self._batch_rows(block_number, log_index, cid))
+                except Exception as e:
+                    deferred.append((block_number, log_index, cid, 1, str(e)))
+
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?)", event_rows)
+            self._db.executemany("INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", message_rows)
+            self._db.executemany("INSERT OR IGNORE INTO pending_batches VALUES (?, ?, ?, ?, ?)", deferred)
+            if self.points_are_deltas:
+                self._db.executemany(
+                    "INSERT INTO points VALUES (?, ?, ?) ON CONFLICT(user_key) DO UPDATE SET"
+                    " points = points + excluded.points, block_number = excluded.block_number",
+                    [(user_key, total, block) for user_key, (total, block) in points.items()]
+                )
+            else:
+                self._db.executemany("INSERT OR REPLACE INTO points VALUES (?, ?, ?)",
+                                     [(user_key, total, block) for user_key, (total, block) in points.items()])
+            self._db.execute("INSERT OR REPLACE INTO state VALUES ('next_block', ?)", (next_block,))
+        self.next_block = next_block
+        self.counters["logs"] += len(event_rows)
+        self.counters["messages"] += len(message_rows)
+        self.counters["batches_deferred"] += len(deferred)
+
+    def _batch_rows(self, block_number, log_index, cid):
+        return [(block_number, log_index, position, entry["author_id"], entry["content"], entry["reply"],
+                 entry.get("timestamp"), cid)
+                for position, entry in enumerate(self.load_batch(cid)["entries"])]
+
+    def backfill_batches(self, limit=50):
+        """
+        Retries loading batches that failed during indexing, least-tried first.
+        :return: Number of batches loaded.
+        """
+        if self.load_batch is None:
+            return 0
+        with self._lock:
+            pending = self._db.execute(
+                "SELECT block_number, log_index, cid FROM pending_batches ORDER BY attempts, block_number LIMIT ?",
+                (limit,)
+            ).fetchall()
+        loaded = 0
+        for block_number, log_index, cid in pending:
+            try:
+                rows = self._batch_rows(block_number, log_index, cid)
+            except Exception as e:
+                with self._lock, self._db:
+                    self._db.execute("UPDATE pending_batches SET attempts = attempts + 1, last_error = ?"
+                                     " WHERE block_number = ? AND log_index = ?", (str(e), block_number, log_index))
+                continue
+            with self._lock, self._db:
+                self._db.executemany("INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("DELETE FROM pending_batches WHERE block_number = ? AND log_index = ?",
+                                 (block_number, log_index))
+            loaded += 1
+            self.counters["messages"] += len(rows)
+        self.counters["batches_backfilled"] += loaded
+        return loaded
+
+    def pending_batches(self):
+        """
+        :return: Number of batches still waiting for backfill.
+        """
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending_batches").fetchone()[0]
+
+    def follow(self, poll_interval=12.0, stop_event=None):
+        """
+        Keeps the index at the confirmed head until `stop_event` is set.
+        """
+        while stop_event is None or not stop_event.is_set():
+            try:
+                self.sync_once()
+                self.backfill_batches()
+            except Exception as e:
+                print(f"Event indexer error: {e}")
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+    def top_points(self, n=10):
+        """
+        :return: List of (user, points) with the highest totals.
+        """
+        with self._lock:
+            return self._db.execute("SELECT user_key, points FROM points ORDER BY points DESC LIMIT ?",
+                                    (n,)).fetchall()
+
+    def user_points(self, user):
+        with self._lock:
+            row = self._db.execute("SELECT points FROM points WHERE user_key = ?", (str(user),)).fetchone()
+        return row[0] if row else 0
+
+    def user_messages(self, user, limit=50):
+        """
+        A user's most recent logged messages, newest first.
+        :return: List of dicts with "content", "reply", "timestamp", "block_number" and "cid".
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT content, reply, timestamp, block_number, cid FROM messages WHERE author_id = ?"
+                " ORDER BY block_number DESC, log_index DESC, position DESC LIMIT ?",
+                (str(user), limit)
+            ).fetchall()
+        return [dict(zip(("content", "reply", "timestamp", "block_number", "cid"), row)) for row in rows]
+
+    def events_of(self, event, user=None, limit=100):
+        """
+        Most recent raw events of one type, optionally for one user.
+        :return: List of dicts with "block_number", "tx_hash" and the decoded "args".
+        """
+        query = "SELECT block_number, tx_hash, args FROM events WHERE event = ?"
+        params = [event]
+        if user is not None:
+            query += " AND user_key = ?"
+            params.append(str(user))
+        query += " ORDER BY block_number DESC, log_index DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [{"block_number": block, "tx_hash": tx_hash, "args": json.loads(args)} for block, tx_hash, args in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# Example Usage:
+if __name__ == "__main__":
+    web3 = Web3(Web3.HTTPProvider("https://your_rpc_url"))  # Replace with your provider
+    contract = web3.eth.contract(address=Web3.to_checksum_address("0xYourSmartContractAddress"), abi=[...])
+
+    indexer = EventIndexer(web3, contract, start_block=0)
+    print(f"Indexed {indexer.sync_once()} logs: {indexer.counters}")
+    print(f"Top 10: {indexer.top_points(10)}")
+    print(f"Recent messages of 1234: {indexer.user_messages('1234', limit=5)}")
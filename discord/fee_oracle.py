@@ -0,0 +1,168 @@
+import threading
+import time
+
+# Priority-fee percentile (of recent blocks) paid for each urgency level
+URGENCY_PERCENTILES = {"low": 10, "medium": 50, "high": 90}
+# maxFeePerGas = next base fee * multiplier + tip, so the transaction survives base-fee increases
+URGENCY_BASE_FEE_MULTIPLIER = {"low": 1.25, "medium": 2, "high": 3}
+
+
+class FeeOracle:
+    """
+    Gas limits and EIP-1559 fees for contract writes.
+
+    - eth_estimateGas results are cached per contract function, sender and
+      calldata size, so repeated calls such as storeData(new CID) reuse one
+      estimate while a call with longer arguments gets its own. Gas also
+      depends on contract state (the first write to a storage slot costs about
+      20k gas more than a later one); the gas margin absorbs most of that, and
+      a transaction that runs out of gas drops its cached estimate.
+    - Fees come from eth_feeHistory percentiles, cached for a few seconds so a
+      burst of transactions costs one RPC call.
+    - Each call picks an urgency level ("low", "medium", "high").
+    - Receipts are fed back to track what was paid versus what was reserved.
+
+    Create one FeeOracle per chain and pass it to every TransactionSubmitter,
+    so they share its caches and metrics.
+    """
+
+    def __init__(self, web3, history_blocks=20, fee_ttl=12.0, estimate_ttl=600.0,
+                 gas_margin=1.2, legacy_gas_price_gwei=20):
+        """
+        :param web3: Web3 instance.
+        :param history_blocks: Number of recent blocks sampled by eth_feeHistory.
+        :param fee_ttl: Seconds a fee-history sample is reused (about one block).
+        :param estimate_ttl: Seconds a cached gas estimate is reused.
+        :param gas_margin: Multiplier applied to gas estimates.
+        :param legacy_gas_price_gwei: The old fixed price, used as the savings baseline.
+        """
+        self.web3 = web3
+        self.history_blocks = history_blocks
+        self.fee_ttl = fee_ttl
+        self.estimate_ttl = estimate_ttl
+        self.gas_margin = gas_margin
+        self.legacy_gas_price = web3.to_wei(legacy_gas_price_gwei, 'gwei')
+        self._estimates = {}       # key -> (gas, fetched_at)
+        self._fee_history = None   # (sample, fetched_at)
+        self._lock = threading.Lock()
+        self.metrics = {}          # urgency -> counters, see record_receipt
+
+    @staticmethod
+    def _estimate_key(contract_function, sender=None):
+        try:
+            size = len(contract_function._encode_transaction_data())
+        except Exception:
+            # Not encodable offline: approximate the calldata size in 32-byte words from the arguments
+            args = (getattr(contract_function, "args", ()) or (), getattr(contract_function, "kwargs", {}) or {})
+            size = 32 * (len(repr(args)) // 32 + 1)
+        return contract_function.address, contract_function.fn_name, sender, size
+
+    def estimate_gas(self, contract_function, sender):
+        """
+        Returns a gas limit for the call, from cache when possible.
+        :param contract_function: Bound contract function.
+        :param sender: Address the transaction is sent from.
+        :return: Gas limit including the safety margin.
+        """
+        key = self._estimate_key(contract_function, sender)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._estimates.get(key)
+        if cached and now - cached[1] < self.estimate_ttl:
+            return cached[0]
+        gas = int(contract_function.estimate_gas({'from': sender}) * self.gas_margin)
+        with self._lock:
+            self._estimates[key] = (gas, now)
+        return gas
+
+    def invalidate_estimate(self, contract_function, sender=None):
+        """
+        Forgets the cached estimate, e.g. after a transaction ran out of gas.
+        """
+        with self._lock:
+            self._estimates.pop(self._estimate_key(contract_function, sender), None)
+
+    def _sample(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._fee_history and now - self._fee_history[1] < self.fee_ttl:
+                return self._fee_history[0]
+        percentiles = sorted(URGENCY_PERCENTILES.values())
+        try:
+            history = self.web3.eth.fee_history(self.history_blocks, "latest", percentiles)
+        except Exception as e:
+            # No EIP-1559 on this node: fall back to gasPrice (the sample is cached as None for fee_ttl)
+            print(f"eth_feeHistory unavailable, using gasPrice: {e}")
+            history = {}
+        base_fees = history.get("baseFeePerGas") or []
+        rewards = history.get("reward") or []
+        sample = None
+        if base_fees and rewards:
+            tips = {}
+            for urgency, percentile in URGENCY_PERCENTILES.items():
+                column = sorted(block[percentiles.index(percentile)] for block in rewards)
+                tips[urgency] = column[len(column) // 2]
+            # The last base fee returned is the one for the next block.
+            sample = {"base_fee": base_fees[-1], "tips": tips}
+        with self._lock:
+            self._fee_history = (sample, now)
+        return sample
+
+    def fees(self, urgency="medium"):
+        """
+        Fee fields for a transaction at the given urgency.
+        :param urgency: "low", "medium" or "high".
+        :return: {"maxFeePerGas", "maxPriorityFeePerGas"}, or {"gasPrice"} on chains without EIP-1559.
+        """
+        if urgency not in URGENCY_PERCENTILES:
+            raise ValueError(f"Unknown urgency '{urgency}'. Choose one of: {', '.join(URGENCY_PERCENTILES)}")
+        sample = self._sample()
+        if sample is None:
+            return {"gasPrice": self.web3.eth.gas_price}
+        tip = sample["tips"][urgency]
+        max_fee = int(sample["base_fee"] * URGENCY_BASE_FEE_MULTIPLIER[urgency]) + tip
+        return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": tip}
+
+    def tx_params(self, contract_function, sender, urgency="medium", gas=None):
+        """
+        Gas limit and fee fields for a contract call.
+        :param gas: Gas limit to use instead of the (cached) estimate.
+        :return: Dictionary to merge into the transaction.
+        """
+        return {"gas": gas or self.estimate_gas(contract_function, sender), **self.fees(urgency)}
+
+    def record_receipt(self, tx, receipt, urgency="medium"):
+        """
+        Updates the overpay metrics with a mined transaction.
+        :param tx: The transaction dictionary that was signed.
+        :param receipt: Its receipt.
+        :param urgency: Urgency level it was sent with.
+        """
+        gas_used = receipt["gasUsed"]
+        price = receipt.get("effectiveGasPrice") or tx.get("gasPrice") or 0
+        fee_cap = tx.get("maxFeePerGas") or tx.get("gasPrice") or 0
+        with self._lock:
+            stats = self.metrics.setdefault(urgency, {
+                "transactions": 0,
+                "fee_paid_wei": 0,          # What the transactions actually cost
+                "fee_reserved_wei": 0,      # gas limit * fee cap, the worst case we signed for
+                "unused_gas": 0,            # Gas limit we asked for but did not use
+                "saved_vs_fixed_wei": 0,    # Versus the old fixed gas price; negative means we paid more
+            })
+            stats["transactions"] += 1
+            stats["fee_paid_wei"] += gas_used * price
+            stats["fee_reserved_wei"] += tx["gas"] * fee_cap
+            stats["unused_gas"] += tx["gas"] - gas_used
+            stats["saved_vs_fixed_wei"] += gas_used * (self.legacy_gas_price - price)
+
+    def report(self):
+        """
+        :return: Copy of the per-urgency metrics with the overpay ratio
+                 (paid / reserved) added.
+        """
+        with self._lock:
+            report = {urgency: dict(stats) for urgency, stats in self.metrics.items()}
+        for stats in report.values():
+            reserved = stats["fee_reserved_wei"]
+            stats["paid_to_reserved_ratio"] = round(stats["fee_paid_wei"] / reserved, 4) if reserved else None
+        return report
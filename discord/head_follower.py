@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _as_block_number(value):
+    """
+    Normalizes the head returned by EthereumModule (int) and NethermindModule (JSON-RPC response).
+    """
+    if isinstance(value, dict):
+        if "result" not in value:
+            raise RuntimeError(f"Failed to fetch head block number: {value.get('error')}")
+        return int(value["result"], 16)
+    return int(value)
+
+
+class HeadFollower:
+    """
+    Streams blocks from an EthereumModule or NethermindModule as the chain grows.
+
+    - follow() is a generator and follow_async() an async iterator over block dicts.
+    - Blocks are fetched in batches of up to `window` blocks, and the next
+      window is fetched while the current one is being consumed.
+    - Every block's parentHash is checked against the previous block. On a
+      mismatch the follower rewinds until it finds the common ancestor,
+      reporting each orphaned block to `on_reorg`.
+    - The position is checkpointed to a JSON file after each window, so a
+      restart resumes where it stopped (blocks of an unfinished window may
+      be delivered again).
+    - RPC errors (node down, timeouts) do not end the stream: the follower
+      waits with exponential backoff, up to `max_backoff` seconds, and retries.
+    """
+
+    def __init__(self, module, checkpoint_path="head_follower.json", start_block=None, window=50,
+                 confirmations=0, poll_interval=2.0, reorg_depth=128, on_reorg=None, max_backoff=60.0):
+        """
+        :param module: EthereumModule / NethermindModule, or their async versions for follow_async().
+        :param checkpoint_path: File the position is saved to.
+        :param start_block: First block to deliver when there is no checkpoint (defaults to the head).
+        :param window: Maximum number of blocks fetched per batch.
+        :param confirmations: Stay this many blocks behind the head.
+        :param poll_interval: Seconds to wait when caught up.
+        :param reorg_depth: Number of recent block hashes kept to detect reorgs.
+        :param on_reorg: Optional callable(block_number, block_hash) for every orphaned block.
+        :param max_backoff: Longest wait in seconds between retries after RPC errors.
+        """
+        self.module = module
+        self.checkpoint_path = checkpoint_path
+        self.window = window
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.on_reorg = on_reorg
+        self.max_backoff = max_backoff
+        self.recent = deque(maxlen=reorg_depth)   # (number, hash) of delivered blocks
+        self.next_block = start_block
+        self.counters = {"blocks": 0, "reorgs": 0, "orphaned": 0, "rpc_errors": 0}
+        self._rewinding = False
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        self.next_block = state["next_block"]
+        self.recent.extend(tuple(item) for item in state.get("recent", []))
+
+    def save_checkpoint(self):
+        """
+        Atomically writes the current position to the checkpoint file.
+        """
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"next_block": self.next_block, "recent": list(self.recent)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _safe_head(self, head):
+        return _as_block_number(head) - self.confirmations
+
+    def _window_for(self, safe_head):
+        return range(self.next_block, min(safe_head, self.next_block + self.window - 1) + 1)
+
+    def _backoff(self, failures, error):
+        """
+        Counts an RPC error.
+        :return: Seconds to wait before retrying, doubling with each consecutive failure.
+        """
+        self.counters["rpc_errors"] += 1
+        delay = min(self.poll_interval * 2 ** (failures - 1), self.max_backoff)
+        print(f"Head follower RPC error, retrying in {delay:.1f}s: {error}")
+        return delay
+
+    def _accept(self, response):
+        """
+        Checks one fetched block against the chain seen so far.
+        :return: The block to deliver, or None if the window must be refetched
+                 (fetch error or reorg, in which case the position was rewound).
+        """
+        block = response.get("result") if isinstance(response, dict) else None
+        if not block:
+            return None   # Not available yet or failed; retried on the next poll
+        number = int(block["number"], 16)
+        if self.recent and self.recent[-1][0] == number - 1 and self.recent[-1][1] != block["parentHash"]:
+            orphan_number, orphan_hash = self.recent.pop()
+            if not self._rewinding:
+                self.counters["reorgs"] += 1
+                self._rewinding = True
+            self.counters["orphaned"] += 1
+            if self.on_reorg:
+                self.on_reorg(orphan_number, orphan_hash)
+            self.next_block = orphan_number
+            return None
+        self._rewinding = False
+        self.recent.append((number, block["hash"]))
+        self.next_block = number + 1
+        self.counters["blocks"] += 1
+        return block
+
+    def follow(self):
+        """
+        Yields finalized-enough blocks forever, in order, across restarts.
+        """
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            prefetch = None   # (numbers, future)
+            failures = 0
+            while True:
+                try:
+                    if self.next_block is None:
+                        self.next_block = self._safe_head(self.module.get_block_number())
+                    safe_head = self._safe_head(self.module.get_block_number())
+                    if self.next_block > safe_head:
+                        time.sleep(self.poll_interval)
+                        continue
+
+                    numbers = self._window_for(safe_head)
+                    if prefetch and prefetch[0] == numbers:
+                        responses = prefetch[1].result()
+                    else:
+                        responses = self.module.get_blocks(numbers)
+                except Exception as e:
+                    prefetch = None
+                    failures += 1
+                    time.sleep(self._backoff(failures, e))
+                    continue
+                failures = 0
+                prefetch = None
+
+                # Fetch the following window while this one is being consumed.
+                following = range(numbers.stop, min(safe_head, numbers.stop + self.window - 1) + 1)
+                if following:
+                    prefetch = (following, prefetcher.submit(self.module.get_blocks, following))
+
+                orphaned_before = self.counters["orphaned"]
+                for response in responses:
+                    block = self._accept(response)
+                    if block is None:
+                        break
+                    yield block
+                if self.counters["orphaned"] != orphaned_before:
+                    prefetch = None
+                self.save_checkpoint()
+
+    async def follow_async(self):
+        """
+        Async iterator version of follow(), for AsyncEthereumModule / AsyncNethermindModule.
+        """
+        prefetch = None   # (numbers, task)
+        failures = 0
+        try:
+            while True:
+                try:
+                    if self.next_block is None:
+                        self.next_block = self._safe_head(await self.module.get_block_number())
+                    safe_head = self._safe_head(await self.module.get_block_number())
+                    if self.next_block > safe_head:
+                        await asyncio.sleep(self.poll_interval)
+                        continue
+
+                    numbers = self._window_for(safe_head)
+                    if prefetch and prefetch[0] == numbers:
+                        responses = await prefetch[1]
+                    else:
+                        if prefetch:
+                            prefetch[1].cancel()
+                        responses = await self.module.get_blocks(numbers)
+                except Exception as e:
+                    if prefetch:
+                        prefetch[1].cancel()
+                    prefetch = None
+                    failures += 1
+                    await asyncio.sleep(self._backoff(failures, e))
+                    continue
+                failures = 0
+                prefetch = None
+
+                following = range(numbers.stop, min(safe_head, numbers.stop + self.window - 1) + 1)
+                if following:
+                    prefetch = (following, asyncio.ensure_future(self.module.get_blocks(following)))
+
+                orphaned_before = self.counters["orphaned"]
+                for response in responses:
+                    block = self._accept(response)
+                    if block is None:
+                        break
+                    yield block
+                if self.counters["orphaned"] != orphaned_before and prefetch:
+                    prefetch[1].cancel()
+                    prefetch = None
+                await asyncio.to_thread(self.save_checkpoint)
+        finally:
+            if prefetch:
+                prefetch[1].cancel()
+
+
+# Example Usage:
+if __name__ == "__main__":
+    from Nethermind import NethermindModule
+
+    nethermind = NethermindModule("http://127.0.0.1:8545")
+    follower = HeadFollower(
+        nethermind, checkpoint_path="nethermind_follower.json", confirmations=2,
+        on_reorg=lambda number, block_hash: print(f"Block {number} ({block_hash}) was orphaned")
+    )
+    for block in follower.follow():
+        print(int(block["number"], 16), block["hash"], len(block["transactions"]), "transactions")
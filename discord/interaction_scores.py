@@ -0,0 +1,166 @@
+import sqlite3
+import threading
+
+
+def count_interactions(posts):
+    """
+    Points for a list of posts: one per post the user liked or reposted
+    (the same rule as check_user_interactions in x.fetch.py).
+    """
+    return sum(1 for post in posts if post.get("liked") or post.get("retweeted"))
+
+
+def _newest_id(posts, current):
+    # X post ids are numeric strings: compare by value, not lexically
+    newest = current
+    for post in posts:
+        post_id = post.get("id")
+        if post_id is not None and (newest is None or int(post_id) > int(newest)):
+            newest = post_id
+    return newest
+
+
+class InteractionScorer:
+    """
+    Incremental interaction scoring backed by SQLite.
+
+    Each user has a `since_id` watermark, so a run only fetches posts newer
+    than the last run saw. A run then costs about as much as the new activity,
+    not the whole timeline. The watermark only moves once pagination has
+    reached it: a user cut off at the fetcher's max_pages keeps the old
+    watermark plus a resume cursor, and the next run continues from there.
+    Running totals are kept next to what has already been settled on-chain,
+    so only the difference has to be uploaded.
+    """
+
+    def __init__(self, fetcher, path="interaction_scores.sqlite", commit_every=500):
+        """
+        :param fetcher: XTimelineFetcher used to fetch timelines.
+        :param path: SQLite file path.
+        :param commit_every: Users scored per write transaction.
+        """
+        self.fetcher = fetcher
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " user_id TEXT PRIMARY KEY, since_id TEXT,"
+            " points INTEGER NOT NULL DEFAULT 0, settled INTEGER NOT NULL DEFAULT 0,"
+            " resume_token TEXT, resume_since_id TEXT) WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(scores)")}
+        for column in ("resume_token", "resume_since_id"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE scores ADD COLUMN {column} TEXT")
+        self.counters = {"users": 0, "posts": 0, "points": 0}
+
+    def watermarks(self):
+        """
+        :return: Dictionary of user_id -> since_id for users scored before.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT user_id, since_id FROM scores WHERE since_id IS NOT NULL").fetchall()
+        return dict(rows)
+
+    def resume_cursors(self):
+        """
+        :return: Dictionary of user_id -> (pagination token, newest id seen) for users whose
+                 last fetch stopped before reaching their watermark.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT user_id, resume_token, resume_since_id FROM scores WHERE resume_token IS NOT NULL"
+            ).fetchall()
+        return {user_id: (token, newest) for user_id, token, newest in rows}
+
+    def score(self, users):
+        """
+        Fetches and scores only posts newer than each user's watermark, adding them to the running totals.
+        :param users: Iterable of (user_id, token) pairs.
+        :return: Dictionary of user_id -> points earned in this run (users with new posts only).
+        """
+        since_ids = self.watermarks()
+        cursors = self.resume_cursors()
+        earned, rows = {}, []
+        users = ((str(user_id), token) for user_id, token in users)
+        resume_tokens = {user_id: token for user_id, (token, _) in cursors.items()}
+        for user_id, posts in self.fetcher.fetch_many(users, since_ids=since_ids, resume_tokens=resume_tokens):
+            # A resumed fetch continues below the newest post the interrupted one saw
+            newest = _newest_id(posts, cursors[user_id][1] if user_id in cursors else since_ids.get(user_id))
+            points = count_interactions(posts)
+            self.counters["users"] += 1
+            self.counters["posts"] += len(posts)
+            self.counters["points"] += points
+            if posts:
+                earned[user_id] = points
+            next_token = self.fetcher.incomplete.get(user_id)
+            if next_token:
+                # Stopped at max_pages: keep the watermark until the gap down to it is fetched
+                rows.append((str(user_id), since_ids.get(user_id), points, next_token, newest))
+            elif posts or user_id in cursors:
+                rows.append((str(user_id), newest, points, None, None))
+            if len(rows) >= self.commit_every:
+                self._write(rows)
+                rows = []
+        if rows:
+            self._write(rows)
+        return earned
+
+    def _write(self, rows):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO scores (user_id, since_id, points, resume_token, resume_since_id) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(user_id) DO UPDATE SET since_id = excluded.since_id,"
+                " points = points + excluded.points, resume_token = excluded.resume_token,"
+                " resume_since_id = excluded.resume_since_id",
+                rows
+            )
+
+    def total(self, user_id):
+        """
+        :return: Running point total for `user_id` (0 if never scored).
+        """
+        with self._lock:
+            row = self._db.execute("SELECT points FROM scores WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row[0] if row else 0
+
+    def pending_deltas(self):
+        """
+        Points earned but not yet settled on-chain.
+        :return: Dictionary of user_id -> point delta (non-zero only).
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT user_id, points - settled FROM scores WHERE points != settled").fetchall()
+        return dict(rows)
+
+    def mark_settled(self, deltas):
+        """
+        Records that `deltas` were uploaded, so they are not emitted again.
+        :param deltas: Dictionary of user_id -> delta that was settled.
+        """
+        with self._lock, self._db:
+            self._db.executemany("UPDATE scores SET settled = settled + ? WHERE user_id = ?",
+                                 [(delta, str(user_id)) for user_id, delta in deltas.items()])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# Example Usage:
+if __name__ == "__main__":
+    import os
+    from x_timeline import XTimelineFetcher
+
+    scorer = InteractionScorer(XTimelineFetcher(max_workers=16))
+    users = [(os.getenv("X_USER_ID", "me"), os.getenv("X_ACCESS_TOKEN", "YOUR_ACCESS_TOKEN"))]
+
+    # The first run scores the whole timeline; later runs only see new posts
+    print(f"Earned this run: {scorer.score(users)}")
+    deltas = scorer.pending_deltas()
+    print(f"Point deltas to upload: {deltas}")
+    # ... upload the deltas on-chain, then:
+    scorer.mark_settled(deltas)
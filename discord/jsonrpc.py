@@ -0,0 +1,120 @@
+import asyncio
+import itertools
+
+import async_transport
+import transport
+
+# Most public endpoints cap a batch at 100-1000 calls; 100 is safe everywhere.
+DEFAULT_BATCH_SIZE = 100
+
+_request_ids = itertools.count(1)
+
+
+def next_request_id():
+    """
+    Returns a process-unique JSON-RPC request id.
+    """
+    return next(_request_ids)
+
+
+def build_request(method, params=None, request_id=None):
+    """
+    Builds a single JSON-RPC 2.0 request object.
+    :param method: The JSON-RPC method to call.
+    :param params: The parameters for the method.
+    :param request_id: Explicit id, otherwise a fresh one is assigned.
+    :return: Request payload as a dictionary.
+    """
+    return {
+        "jsonrpc": "2.0",
+        "method": method,
+        "params": params or [],
+        "id": next_request_id() if request_id is None else request_id
+    }
+
+
+def build_batch(calls):
+    """
+    Builds a JSON-RPC batch array from (method, params) pairs.
+    :param calls: Iterable of (method, params) tuples.
+    :return: List of request payloads, each with a unique id.
+    """
+    return [build_request(method, params) for method, params in calls]
+
+
+def match_batch_response(batch, response_json):
+    """
+    Matches a batch response back to its requests by id.
+    Servers may answer in any order and may drop entries, so every request
+    gets either its own response object or an error entry.
+    :param batch: The request payloads that were sent.
+    :param response_json: The decoded response body.
+    :return: List of response objects in the same order as `batch`.
+    """
+    if not isinstance(response_json, list):
+        # Some nodes answer a whole batch with one error object (e.g. batch too large).
+        error = response_json.get("error", response_json) if isinstance(response_json, dict) else response_json
+        return [{"id": request["id"], "error": error} for request in batch]
+
+    by_id = {item.get("id"): item for item in response_json if isinstance(item, dict)}
+    return [
+        by_id.get(request["id"], {"id": request["id"], "error": "No response for this request in batch"})
+        for request in batch
+    ]
+
+
+def chunked(items, size):
+    """
+    Splits a list into consecutive chunks of at most `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def send_batch(url, calls, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Sends many JSON-RPC calls as batch arrays, `chunk_size` calls per HTTP request.
+    :param url: The JSON-RPC endpoint.
+    :param calls: Iterable of (method, params) tuples.
+    :param chunk_size: Maximum number of calls per batch request.
+    :return: List of response objects in the same order as `calls`. Each one has
+             either a "result" or an "error" key, so failures are reported per item.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    results = []
+    for chunk in chunked(build_batch(calls), chunk_size):
+        response = transport.post(url, json=chunk)
+        if response.status_code == 200:
+            results.extend(match_batch_response(chunk, response.json()))
+        else:
+            error = f"Batch request failed: {response.status_code}"
+            results.extend({"id": request["id"], "error": error} for request in chunk)
+    return results
+
+
+async def send_batch_async(url, calls, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Async version of send_batch. Chunks are sent concurrently; the per-endpoint
+    limit in async_transport keeps the number in flight bounded.
+    :param url: The JSON-RPC endpoint.
+    :param calls: Iterable of (method, params) tuples.
+    :param chunk_size: Maximum number of calls per batch request.
+    :return: List of response objects in the same order as `calls`.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    async def send_chunk(chunk):
+        response = await async_transport.post(url, json=chunk)
+        if response.status_code == 200:
+            return match_batch_response(chunk, response.json())
+        error = f"Batch request failed: {response.status_code}"
+        return [{"id": request["id"], "error": error} for request in chunk]
+
+    chunks = list(chunked(build_batch(calls), chunk_size))
+    results = []
+    for chunk_results in await asyncio.gather(*(send_chunk(chunk) for chunk in chunks)):
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,182 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    """
+    Canonical form of a prompt for cache lookups: Unicode-normalized, case-folded,
+    punctuation stripped and whitespace collapsed, so "What is Solana?" and
+    "what is solana" share an entry.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Reply cache that sits in front of the LLM, keyed per channel.
+
+    The exact tier is an LRU of (channel, normalized prompt) -> reply, where
+    each entry expires after `ttl` seconds. The optional similarity tier
+    (enabled by `similarity_threshold`) serves near-duplicate questions. It
+    picks the cached prompt in the same channel with the highest Jaccard
+    similarity of word sets, if that reaches the threshold. Candidates come
+    from an inverted index of words, so a lookup never scans the whole cache.
+
+    Entries are keyed by the question only, not by the conversation before it.
+    With conversation memory enabled that is a deliberate trade-off: a
+    standalone question ("how do I stake?") gets the cached answer even if the
+    channel has talked about something else since. Follow-ups that refer back
+    to earlier turns must not be looked up or stored here; the pipeline skips
+    the cache for them (see conversation_memory.refers_back).
+    """
+
+    def __init__(self, max_entries=5000, ttl=3600.0, similarity_threshold=None, min_prompt_words=1):
+        """
+        :param max_entries: Entries kept across all channels (least recently used are evicted).
+        :param ttl: Seconds a cached reply stays valid.
+        :param similarity_threshold: Jaccard similarity (0-1) for near-duplicate hits; None disables the tier.
+        :param min_prompt_words: Prompts with fewer words are never matched by similarity.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.min_prompt_words = min_prompt_words
+        self._entries = OrderedDict()   # (channel_id, normalized) -> (reply, expires_at, words)
+        self._index = {}                # (channel_id, word) -> set of normalized prompts
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._latency = {"hit": [0, 0.0], "model": [0, 0.0]}   # kind -> [count, total seconds]
+
+    def get(self, channel_id, prompt):
+        """
+        :return: Cached reply for `prompt` in `channel_id`, or None.
+        """
+        normalized = normalize_prompt(prompt)
+        now = time.monotonic()
+        with self._lock:
+            key = (channel_id, normalized)
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return entry[0]
+            if self.similarity_threshold is not None:
+                reply = self._similar(channel_id, normalized, now)
+                if reply is not None:
+                    self.counters["similar_hits"] += 1
+                    return reply
+            self.counters["misses"] += 1
+            return None
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= now:
+            self._remove(key)
+            self.counters["expired"] += 1
+            return None
+        return entry
+
+    def _similar(self, channel_id, normalized, now):
+        words = set(normalized.split())
+        if len(words) < self.min_prompt_words:
+            return None
+        candidates = set()
+        for word in words:
+            candidates.update(self._index.get((channel_id, word), ()))
+        best_key, best_score = None, 0.0
+        for candidate in candidates:
+            key = (channel_id, candidate)
+            entry = self._live(key, now)
+            if entry is None:
+                continue
+            other = entry[2]
+            score = len(words & other) / len(words | other)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][0]
+
+    def put(self, channel_id, prompt, reply):
+        """
+        Caches `reply` for `prompt` in `channel_id`.
+        """
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return
+        key = (channel_id, normalized)
+        words = frozenset(normalized.split())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (reply, time.monotonic() + self.ttl, words)
+            if self.similarity_threshold is not None:
+                for word in words:
+                    self._index.setdefault((channel_id, word), set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.counters["evicted"] += 1
+
+    def _remove(self, key):
+        _, _, words = self._entries.pop(key)
+        if self.similarity_threshold is None:
+            return
+        channel_id, normalized = key
+        for word in words:
+            prompts = self._index.get((channel_id, word))
+            if prompts is not None:
+                prompts.discard(normalized)
+                if not prompts:
+                    del self._index[(channel_id, word)]
+
+    def clear_channel(self, channel_id):
+        """
+        Drops every cached reply for one channel.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == channel_id]:
+                self._remove(key)
+
+    def record_latency(self, kind, seconds):
+        """
+        Records how long a reply took: kind "hit" (served from cache) or "model" (LLM call).
+        """
+        with self._lock:
+            bucket = self._latency[kind]
+            bucket[0] += 1
+            bucket[1] += seconds
+
+    def stats(self):
+        """
+        :return: Dictionary of hit rate, entry count, average latencies and counters.
+        """
+        with self._lock:
+            hits = self.counters["exact_hits"] + self.counters["similar_hits"]
+            lookups = hits + self.counters["misses"]
+            latency = {f"avg_{kind}_latency_s": round(total / count, 4) if count else None
+                       for kind, (count, total) in self._latency.items()}
+            return {
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                **latency,
+                **self.counters,
+            }
+
+
+# Example Usage:
+if __name__ == "__main__":
+    cache = ResponseCache(max_entries=1000, ttl=600, similarity_threshold=0.6)
+    cache.put(1, "What is Solana?", "Solana is a high-throughput blockchain.")
+    print(cache.get(1, "what is solana"))                 # exact hit after normalization
+    print(cache.get(1, "what is solana exactly"))         # similarity hit
+    print(cache.get(2, "What is Solana?"))                # other channel: miss
+    print(cache.stats())
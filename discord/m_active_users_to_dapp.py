@@ -1,8 +1,9 @@
 import datetime
-import json
 import random
-from web3 import Web3
-import ipfshttpclient
+
+from activity_sketch import DailyActivitySketches
+from activity_store import ActivityStore
+from activity_uploader import ActivityUploader
 
 # Mock data for user activity (simulate a random activity log)
 USER_ACTIVITY = [
@@ -10,27 +11,39 @@ USER_ACTIVITY = [
     for i in range(1, 101)
 ]
 
-class DecentralizedUserUploader:
-    def __init__(self, rpc_url, contract_address, contract_abi, ipfs_url="/ip4/127.0.0.1/tcp/5001"):
+# Time-indexed view of the activity data, shared by all uploaders
+ACTIVITY_STORE = ActivityStore.from_records(USER_ACTIVITY)
+# Per-day HyperLogLog sketches of the same data, for approximate analytics on large guilds
+ACTIVITY_SKETCHES = DailyActivitySketches.from_records(USER_ACTIVITY)
+
+ANALYTICS_MODES = ("exact", "approximate")
+
+class DecentralizedUserUploader(ActivityUploader):
+    def __init__(self, rpc_url, contract_address, contract_abi, ipfs_url="/ip4/127.0.0.1/tcp/5001",
+                 activity_store=None, activity_sketches=None, analytics_mode="exact",
+                 activity_log=None, snapshot_state="m_active_users_snapshot.json", fee_oracle=None):
         """
         Initializes the uploader with Ethereum and IPFS details.
         :param rpc_url: Ethereum node RPC URL.
         :param contract_address: Address of the smart contract.
         :param contract_abi: ABI of the smart contract.
         :param ipfs_url: URL for the IPFS client.
+        :param activity_store: ActivityStore to query, defaults to ACTIVITY_STORE.
+        :param activity_sketches: DailyActivitySketches to query, defaults to ACTIVITY_SKETCHES.
+        :param analytics_mode: "exact" lists user IDs (small guilds); "approximate" reports
+                               sketch estimates in a few KB per day (large guilds).
+        :param activity_log: Directory of the bot's ActivityEventLog (or an ActivityLogReader); when given,
+                             activity is read from it, read-only.
+        :param snapshot_state: Local file tracking the latest incremental snapshot.
+        :param fee_oracle: FeeOracle shared with the bot's other submitters on this chain.
         """
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
-        self.contract = self.web3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=contract_abi)
-        self.ipfs = ipfshttpclient.connect(ipfs_url)
-
-    def collect_active_users(self, days):
-        """
-        Filters users active within the last `days` days.
-        :param days: Number of days to consider for activity.
-        :return: List of active user IDs.
-        """
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
-        return [user["user_id"] for user in USER_ACTIVITY if user["last_active"] >= cutoff_date]
+        if analytics_mode not in ANALYTICS_MODES:
+            raise ValueError(f"Invalid analytics mode. Choose one of: {', '.join(ANALYTICS_MODES)}")
+        self.analytics_mode = analytics_mode
+        super().__init__(rpc_url, contract_address, contract_abi, ipfs_url,
+                         activity_store if activity_store is not None else ACTIVITY_STORE,
+                         activity_sketches if activity_sketches is not None else ACTIVITY_SKETCHES,
+                         activity_log=activity_log, snapshot_state=snapshot_state, fee_oracle=fee_oracle)
 
     def collect_users_last_month_not_active_this_month(self):
         """
@@ -42,10 +55,8 @@ class DecentralizedUserUploader:
         first_day_last_month = (now.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
         
         # Users who were active last month but not this month
-        active_last_month = self.collect_active_users_for_period(first_day_last_month, first_day_this_month)
-        active_this_month = self.collect_active_users_for_period(first_day_this_month, now)
-
-        return list(set(active_last_month) - set(active_this_month))
+        return self.activity.users_active_in_not_in(first_day_last_month, first_day_this_month,
+                                                    first_day_this_month, now)
 
     def collect_active_users_for_period(self, start_date, end_date):
         """
@@ -54,36 +65,48 @@ class DecentralizedUserUploader:
         :param end_date: End datetime.
         :return: List of active user IDs in this period.
         """
-        return [user["user_id"] for user in USER_ACTIVITY if start_date <= user["last_active"] < end_date]
+        return self.activity.users_between(start_date, end_date)
 
-    def upload_to_ipfs(self, data):
+    def estimate_active_users(self, days):
         """
-        Uploads data to IPFS.
-        :param data: Data to upload.
-        :return: IPFS hash.
+        Estimates how many users were active within the last `days` days (day granularity):
+        the `days` daily sketches ending with today.
+        :param days: Number of days to consider for activity.
+        :return: Approximate number of distinct active users.
         """
-        json_data = json.dumps(data)
-        result = self.ipfs.add_str(json_data)
-        return result
+        today = datetime.date.today()
+        return self.sketches.estimate_active(today - datetime.timedelta(days=days - 1),
+                                             today + datetime.timedelta(days=1))
 
-    def upload_to_smart_contract(self, ipfs_hash, sender_address, private_key):
+    def estimate_users_last_month_not_active_this_month(self):
         """
-        Calls the smart contract to upload metadata.
-        :param ipfs_hash: IPFS hash of the uploaded data.
-        :param sender_address: Ethereum address of the sender.
-        :param private_key: Private key of the sender.
-        :return: Transaction receipt.
+        Estimates how many users were active last month but not this month.
+        :return: Approximate number of churned users.
         """
-        tx = self.contract.functions.storeData(ipfs_hash).build_transaction({
-            'from': sender_address,
-            'nonce': self.web3.eth.get_transaction_count(sender_address),
-            'gas': 3000000,
-            'gasPrice': self.web3.to_wei('20', 'gwei')
-        })
+        now = datetime.datetime.now()
+        first_day_this_month = now.replace(day=1)
+        first_day_last_month = (now.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+        return self.sketches.estimate_churn(first_day_last_month, first_day_this_month,
+                                            first_day_this_month, now + datetime.timedelta(days=1))
 
-        signed_tx = self.web3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        return self.web3.eth.wait_for_transaction_receipt(tx_hash)
+    def collect_activity_summary(self):
+        """
+        Activity report in the configured analytics mode.
+        :return: User ID lists in "exact" mode, estimated counts in "approximate" mode.
+        """
+        if self.analytics_mode == "approximate":
+            return {
+                "mode": "approximate",
+                "last_day_active": self.estimate_active_users(days=1),
+                "last_month_active": self.estimate_active_users(days=30),
+                "last_month_not_this_month": self.estimate_users_last_month_not_active_this_month(),
+            }
+        return {
+            "mode": "exact",
+            "last_day_active": self.collect_active_users(days=1),
+            "last_month_active": self.collect_active_users(days=30),
+            "last_month_not_this_month": self.collect_users_last_month_not_active_this_month(),
+        }
 
 
 # Example Usage
@@ -112,6 +135,16 @@ if __name__ == "__main__":
     })
     print(f"Data uploaded to IPFS with hash: {ipfs_hash}")
 
+    # Large guilds: upload sketch estimates instead of full user lists
+    approximate_uploader = DecentralizedUserUploader(ETH_RPC_URL, CONTRACT_ADDRESS, CONTRACT_ABI,
+                                                     analytics_mode="approximate")
+    print(f"Approximate activity summary: {approximate_uploader.collect_activity_summary()}")
+
     # Upload IPFS hash to smart contract
     tx_receipt = uploader.upload_to_smart_contract(ipfs_hash, SENDER_ADDRESS, PRIVATE_KEY)
     print(f"Smart contract transaction successful: {tx_receipt}")
+
+    # Incremental snapshot: only the delta is uploaded, and nothing at all if activity is unchanged
+    snapshot_cid, snapshot_receipt = uploader.upload_snapshot(uploader.collect_activity_summary(),
+                                                              SENDER_ADDRESS, PRIVATE_KEY)
+    print(f"Snapshot {snapshot_cid} rebuilds to: {uploader.load_snapshot(snapshot_cid)}")
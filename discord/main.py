@@ -2,6 +2,14 @@ import discord
 from discord.ext import commands
 import google.generativeai as genai
 from web3 import Web3
+import ipfshttpclient
+
+from activity_log import ActivityEventLog
+from batch_logger import BatchedConversationLogger
+from conversation_memory import ConversationMemory
+from llm_cache import ResponseCache
+from message_pipeline import MessagePipeline
+from prefilter import ANSWER, MODERATE, MessagePrefilter
 
 # Configure Gemini AI
 genai.configure(api_key="YOUR_API_KEY")
@@ -20,13 +28,84 @@ intents.messages = True
 intents.guilds = True
 intents.members = True
 
-
+bot = commands.Bot(command_prefix="!", intents=intents)
 
 # Track channels to watch
 watched_channels = set()
 
+
+def generate_reply(prompt):
+    """Blocking Gemini call, run off the event loop by the pipeline."""
+    return model.generate_content(prompt).text
+
+
+def stream_reply(prompt):
+    """Blocking Gemini streaming call: yields text chunks as the model produces them."""
+    for chunk in model.generate_content(prompt, stream=True):
+        if chunk.text:
+            yield chunk.text
+
+
+def summarize_turns(summary, turns):
+    """Blocking Gemini call that folds older turns of a channel into its running summary."""
+    conversation = "\n".join(f"{turn.author}: {turn.prompt}\nAssistant: {turn.reply}" for turn in turns)
+    return model.generate_content(
+        "Update this summary of a Discord conversation with the new messages. "
+        "Keep names, questions and facts; answer with the summary only, in under 150 words.\n\n"
+        f"Summary so far:\n{summary or '(empty)'}\n\nNew messages:\n{conversation}"
+    ).text
+
+
+def commit_log_batch(cid, merkle_root, count):
+    """Record one batch of conversations on-chain: only its IPFS CID and Merkle root."""
+    tx = contract.functions.logBatch(cid, Web3.to_bytes(hexstr=merkle_root), count).transact(
+        {'from': web3.eth.default_account}
+    )
+    return web3.eth.wait_for_transaction_receipt(tx)
+
+
+# Conversations are buffered and committed once per batch (size or age, whichever comes first)
+conversation_logger = BatchedConversationLogger(
+    ipfshttpclient.connect("/ip4/127.0.0.1/tcp/5001"), commit_log_batch,
+    max_batch_size=256, max_batch_age=60.0
+)
+
+# Every member message is appended here; the activity uploaders read it back
+activity_log = ActivityEventLog("activity_log", sync_interval=1.0)
+
+# Repeated questions in a channel are answered from here without calling Gemini
+response_cache = ResponseCache(max_entries=5000, ttl=3600.0, similarity_threshold=None)
+
+# Recent turns per channel go into each prompt; older ones are summarized to stay within the token budget
+conversation_memory = ConversationMemory(history_budget=1500, summary_budget=300, max_turns=50,
+                                         idle_ttl=3600.0, max_channels=1000, summarize=summarize_turns)
+
+pipeline = MessagePipeline(generate_reply, conversation_logger.add, llm_workers=4,
+                           max_pending_replies=100, max_pending_logs=1000,
+                           flush_logs=conversation_logger.flush_if_due, flush_interval=5.0,
+                           response_cache=response_cache,
+                           # Post a placeholder at once and edit it as Gemini streams the reply
+                           stream_reply=stream_reply, edit_interval=1.0,
+                           memory=conversation_memory)
+
+# Decides locally which messages need Gemini at all; bursts from one user become one prompt
+prefilter = MessagePrefilter(
+    moderation_terms=[],  # Add words / phrases to remove, e.g. scam links
+    trigger_keywords=[],  # Leave empty to answer every message that passes the heuristics
+    debounce_seconds=2.0
+)
+
+
+def submit_reply(message):
+    """Hand a (possibly merged) message to the pipeline once the user's burst is over."""
+    if not pipeline.submit(message):
+        bot.loop.create_task(
+            message.channel.send("I'm handling a lot of messages right now, please try again shortly.")
+        )
+
 @bot.event
 async def on_ready():
+    pipeline.start()
     print(f"Logged in as {bot.user}")
 
 @bot.command(name="watch")
@@ -36,30 +115,31 @@ async def watch_channel(ctx):
     watched_channels.add(ctx.channel.id)
     await ctx.send(f"Watching this channel: {ctx.channel.mention}")
 
+@bot.command(name="pipeline")
+@commands.has_permissions(administrator=True)
+async def pipeline_stats(ctx):
+    """Show reply/log queue depths, backpressure counters, reply cache hit rate and pre-filter savings."""
+    stats = {**pipeline.stats(), **{f"prefilter_{key}": value for key, value in prefilter.stats().items()}}
+    await ctx.send("\n".join(f"{key}: {value}" for key, value in stats.items()))
+
 @bot.event
 async def on_message(message):
     if message.author.bot:
         return
 
-    if message.channel.id in watched_channels:
-        # Generate a reply using Gemini AI
-        try:
-            response = model.generate_content(message.content)
-            ai_reply = response.text
+    # A memory-mapped append, no disk wait on the event loop
+    activity_log.append(message.author.id, message.created_at.timestamp())
 
-            # Log the conversation in Web3
+    if message.channel.id in watched_channels:
+        decision, reason = prefilter.classify(message)
+        if decision == MODERATE:
             try:
-                tx = contract.functions.logMessage(message.author.id, message.content, ai_reply).transact(
-                    {'from': web3.eth.default_account}
-                )
-                web3.eth.wait_for_transaction_receipt(tx)
-            except Exception as e:
-                print(f"Web3 logging error: {e}")
-
-            await message.channel.send(ai_reply)
-        except Exception as e:
-            print(f"Gemini AI error: {e}")
-            await message.channel.send("Sorry, I couldn't generate a response.")
+                await message.delete()
+            except discord.HTTPException as e:
+                print(f"Could not remove message {message.id}: {e}")
+        elif decision == ANSWER:
+            # The pipeline takes over after the debounce; the reply and on-chain log happen in the background
+            prefilter.debounce(message, submit_reply)
 
     await bot.process_commands(message)
 
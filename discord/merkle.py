@@ -0,0 +1,79 @@
+import hashlib
+import json
+
+
+def hash_leaf(entry):
+    """
+    Hashes one log entry. Entries are serialized as canonical JSON so the
+    same entry always produces the same leaf.
+    :param entry: JSON-serializable dictionary.
+    :return: 32-byte digest.
+    """
+    encoded = json.dumps(entry, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    # The 0x00 prefix keeps leaves and inner nodes in separate domains.
+    return hashlib.sha256(b"\x00" + encoded).digest()
+
+
+def _hash_pair(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaves):
+    """
+    Builds every level of the Merkle tree, leaves first. An odd node at the
+    end of a level is paired with itself.
+    :param leaves: List of 32-byte leaf digests.
+    :return: List of levels; the last level holds only the root.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            _hash_pair(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+            for i in range(0, len(level), 2)
+        ])
+    return levels
+
+
+def merkle_root(leaves):
+    """
+    :param leaves: List of 32-byte leaf digests.
+    :return: 32-byte root digest.
+    """
+    return build_levels(leaves)[-1][0]
+
+
+def merkle_proof(levels, index):
+    """
+    Returns the sibling path for the leaf at `index`.
+    :param levels: Output of build_levels.
+    :param index: Position of the leaf.
+    :return: List of [sibling_hex, sibling_is_left] pairs, leaf level first.
+    """
+    if not 0 <= index < len(levels[0]):
+        raise IndexError(f"Leaf index {index} out of range")
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling >= len(level):
+            sibling = index
+        proof.append([level[sibling].hex(), sibling < index])
+        index //= 2
+    return proof
+
+
+def verify_proof(entry, proof, root_hex):
+    """
+    Checks that `entry` is part of the tree with root `root_hex`.
+    :param entry: The original log entry.
+    :param proof: Sibling path from merkle_proof.
+    :param root_hex: Hex root as committed on-chain (with or without 0x).
+    :return: True if the entry is included.
+    """
+    node = hash_leaf(entry)
+    for sibling_hex, sibling_is_left in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _hash_pair(sibling, node) if sibling_is_left else _hash_pair(node, sibling)
+    return node.hex() == root_hex.lower().removeprefix("0x")
@@ -0,0 +1,311 @@
+import asyncio
+import threading
+import time
+
+# Discord rejects messages longer than this
+DISCORD_MESSAGE_LIMIT = 2000
+STREAM_PLACEHOLDER = "…"
+ERROR_REPLY = "Sorry, I couldn't generate a response."
+
+
+class MessagePipeline:
+    """
+    Staged, non-blocking handling of watched-channel messages:
+
+        on_message -> [reply queue] -> LLM workers -> reply sent
+                                                   -> [log queue] -> on-chain logger
+
+    Both queues are bounded. When the reply queue is full, submit() refuses the
+    message instead of stalling the gateway; when the log queue is full the log
+    entry is dropped, so on-chain logging can never delay a reply.
+    """
+
+    def __init__(self, generate_reply, log_conversation, llm_workers=4,
+                 max_pending_replies=100, max_pending_logs=1000,
+                 flush_logs=None, flush_interval=5.0, response_cache=None,
+                 stream_reply=None, edit_interval=1.0, memory=None):
+        """
+        :param generate_reply: Blocking callable(prompt) -> reply text. Runs in a worker thread.
+        :param log_conversation: Blocking callable(author_id, content, reply). Runs in a worker thread.
+        :param llm_workers: Number of concurrent LLM calls.
+        :param max_pending_replies: Capacity of the reply queue.
+        :param max_pending_logs: Capacity of the log queue.
+        :param flush_logs: Optional blocking callable run by the logging stage every
+                           `flush_interval` seconds, e.g. a batch logger's flush_if_due.
+        :param flush_interval: Seconds between flush_logs calls.
+        :param response_cache: Optional ResponseCache; a cached reply is sent without calling the model.
+        :param stream_reply: Optional blocking callable(prompt) -> iterator of text chunks. When set, a
+                             placeholder is sent at once and edited as chunks arrive.
+        :param edit_interval: Minimum seconds between edits in one channel (Discord allows about 5 per 5s).
+        :param memory: Optional ConversationMemory; prompts then carry the channel's recent conversation.
+        """
+        self.generate_reply = generate_reply
+        self.log_conversation = log_conversation
+        self.flush_logs = flush_logs
+        self.flush_interval = flush_interval
+        self.response_cache = response_cache
+        self.stream_reply = stream_reply
+        self.edit_interval = edit_interval
+        self.memory = memory
+        self._next_edit_at = {}   # channel id -> monotonic time the next edit is allowed
+        self.llm_workers = llm_workers
+        self.reply_queue = asyncio.Queue(maxsize=max_pending_replies)
+        self.log_queue = asyncio.Queue(maxsize=max_pending_logs)
+        self._tasks = []
+        self.counters = {
+            "accepted": 0,
+            "rejected": 0,        # Reply queue full (backpressure)
+            "replied": 0,
+            "llm_errors": 0,
+            "reply_errors": 0,    # Failed Discord calls while answering
+            "logged": 0,
+            "log_errors": 0,
+            "logs_dropped": 0,    # Log queue full
+            "streamed": 0,
+            "edits": 0,
+        }
+        self._llm_busy = 0
+        self._reply_latency_total = 0.0
+        self._first_token_total = 0.0
+        self._first_token_count = 0
+
+    @property
+    def running(self):
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """
+        Starts the LLM workers and the logging stage on the running event loop.
+        Calling it again while running is a no-op.
+        """
+        if self.running:
+            return
+        self._tasks = [asyncio.create_task(self._llm_worker()) for _ in range(self.llm_workers)]
+        self._tasks.append(asyncio.create_task(self._log_worker()))
+
+    async def stop(self):
+        """
+        Cancels all workers. Pending queue items are discarded.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, message):
+        """
+        Queues a Discord message for a reply without waiting.
+        :param message: discord.Message to answer.
+        :return: True if queued, False if the pipeline is saturated.
+        """
+        try:
+            self.reply_queue.put_nowait((message, time.monotonic()))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            return False
+        self.counters["accepted"] += 1
+        return True
+
+    async def _llm_worker(self):
+        while True:
+            message, queued_at = await self.reply_queue.get()
+            self._llm_busy += 1
+            try:
+                await self._answer(message, queued_at)
+            except Exception as e:
+                # One failed reply (e.g. Discord rejecting a send) must not take the worker down
+                self.counters["reply_errors"] += 1
+                print(f"Reply error: {e}")
+            finally:
+                self._llm_busy -= 1
+                self.reply_queue.task_done()
+
+    async def _answer(self, message, queued_at):
+        started = time.monotonic()
+        cache = self.response_cache
+        prompt, follow_up = message.content, False
+        if self.memory is not None:
+            prompt, follow_up = self.memory.build_prompt(message.channel.id, message.author.display_name,
+                                                         message.content)
+        if follow_up:
+            # "And its fees?" means something else after every turn: never answer it from the cache
+            cache = None
+        ai_reply = cache.get(message.channel.id, message.content) if cache is not None else None
+        cache_hit = ai_reply is not None
+        if cache_hit:
+            cache.record_latency("hit", time.monotonic() - started)
+            await self._send(message.channel, ai_reply)
+        elif self.stream_reply is not None:
+            ai_reply = await self._stream(message, prompt, queued_at)
+            if ai_reply is None:
+                return
+        else:
+            try:
+                ai_reply = await asyncio.to_thread(self.generate_reply, prompt)
+                if not ai_reply or not ai_reply.strip():
+                    raise ValueError("empty reply")
+            except Exception as e:
+                self.counters["llm_errors"] += 1
+                print(f"Gemini AI error: {e}")
+                await self._send(message.channel, ERROR_REPLY)
+                return
+            await self._send(message.channel, ai_reply)
+
+        if cache is not None and not cache_hit:
+            cache.record_latency("model", time.monotonic() - started)
+            cache.put(message.channel.id, message.content, ai_reply)
+
+        self.counters["replied"] += 1
+        self._reply_latency_total += time.monotonic() - queued_at
+
+        if self.memory is not None:
+            # May summarize older turns (a model call), so keep it off the event loop
+            await asyncio.to_thread(self.memory.add_turn, message.channel.id, message.author.display_name,
+                                    message.content, ai_reply)
+
+        # A debounced burst is logged as the messages the user actually sent; the reply goes with the last one
+        originals = getattr(message, "messages", None) or [message]
+        for original in originals:
+            try:
+                self.log_queue.put_nowait((original.author.id, original.content,
+                                           ai_reply if original is originals[-1] else ""))
+            except asyncio.QueueFull:
+                self.counters["logs_dropped"] += 1
+
+    @staticmethod
+    async def _send(channel, text):
+        """
+        Sends `text`, split into several messages where it exceeds Discord's length limit.
+        """
+        for start in range(0, len(text), DISCORD_MESSAGE_LIMIT):
+            await channel.send(text[start:start + DISCORD_MESSAGE_LIMIT])
+
+    async def _stream(self, message, prompt, queued_at):
+        """
+        Sends a placeholder, then edits it as the model streams, no more often than
+        edit_interval per channel. Replies longer than Discord's limit continue in new messages.
+        :return: The full reply, or None if the model or Discord failed or the reply was empty.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for piece in self.stream_reply(prompt):
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(chunks.put_nowait, piece)
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        channel = message.channel
+        try:
+            reply_message = await channel.send(STREAM_PLACEHOLDER)
+        except Exception as e:
+            self.counters["reply_errors"] += 1
+            print(f"Reply error: {e}")
+            return None
+        loop.run_in_executor(None, produce)
+        parts, current, shown = [], "", ""
+        first_token = True
+        try:
+            while True:
+                wait = max(0.0, self._next_edit_at.get(channel.id, 0.0) - time.monotonic())
+                try:
+                    # While an edit is pending, wake up when it is allowed even if no chunk arrives
+                    item = await asyncio.wait_for(chunks.get(), timeout=wait if current != shown else None)
+                except asyncio.TimeoutError:
+                    item = None
+                final = item is done
+                if isinstance(item, Exception) or (final and not (parts or current.strip())):
+                    self.counters["llm_errors"] += 1
+                    print(f"Gemini AI error: {item if isinstance(item, Exception) else 'empty reply'}")
+                    if not (parts or shown):
+                        await reply_message.edit(content=ERROR_REPLY)
+                    return None
+                if item is not None and not final:
+                    current += item
+                while len(current) > DISCORD_MESSAGE_LIMIT:
+                    await self._edit(reply_message, current[:DISCORD_MESSAGE_LIMIT])
+                    parts.append(current[:DISCORD_MESSAGE_LIMIT])
+                    current = current[DISCORD_MESSAGE_LIMIT:]
+                    reply_message = await channel.send(current[:DISCORD_MESSAGE_LIMIT])
+                    shown = current[:DISCORD_MESSAGE_LIMIT]
+                if current != shown and (final or time.monotonic() >= self._next_edit_at.get(channel.id, 0.0)):
+                    await self._edit(reply_message, current)
+                    shown = current
+                if first_token and shown:
+                    first_token = False
+                    self._first_token_total += time.monotonic() - queued_at
+                    self._first_token_count += 1
+                if final:
+                    break
+        except Exception as e:
+            # Discord rejected a send or edit; the model side is fine
+            self.counters["reply_errors"] += 1
+            print(f"Reply error: {e}")
+            return None
+        finally:
+            # Never wait for an abandoned generation; the producer stops at its next chunk
+            stop.set()
+        self.counters["streamed"] += 1
+        return "".join(parts) + current
+
+    async def _edit(self, reply_message, content):
+        channel_id = reply_message.channel.id
+        await reply_message.edit(content=content)
+        self.counters["edits"] += 1
+        self._next_edit_at[channel_id] = time.monotonic() + self.edit_interval
+
+    async def _log_worker(self):
+        while True:
+            if self.flush_logs is None:
+                item = await self.log_queue.get()
+            else:
+                try:
+                    item = await asyncio.wait_for(self.log_queue.get(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    await self._flush_logs()
+                    continue
+            author_id, content, ai_reply = item
+            try:
+                await asyncio.to_thread(self.log_conversation, author_id, content, ai_reply)
+                self.counters["logged"] += 1
+            except Exception as e:
+                self.counters["log_errors"] += 1
+                print(f"Web3 logging error: {e}")
+            finally:
+                self.log_queue.task_done()
+
+    async def _flush_logs(self):
+        try:
+            await asyncio.to_thread(self.flush_logs)
+        except Exception as e:
+            self.counters["log_errors"] += 1
+            print(f"Web3 logging error: {e}")
+
+    def stats(self):
+        """
+        Snapshot of queue depths, backpressure and throughput counters.
+        :return: Dictionary of metrics.
+        """
+        replied = self.counters["replied"]
+        return {
+            "reply_queue_depth": self.reply_queue.qsize(),
+            "reply_queue_capacity": self.reply_queue.maxsize,
+            "log_queue_depth": self.log_queue.qsize(),
+            "log_queue_capacity": self.log_queue.maxsize,
+            "llm_workers_busy": self._llm_busy,
+            "llm_workers": self.llm_workers,
+            "avg_reply_latency_s": round(self._reply_latency_total / replied, 3) if replied else None,
+            "avg_first_token_s": (round(self._first_token_total / self._first_token_count, 3)
+                                  if self._first_token_count else None),
+            **self.counters,
+            **({f"cache_{key}": value for key, value in self.response_cache.stats().items()}
+               if self.response_cache is not None else {}),
+            **({f"memory_{key}": value for key, value in self.memory.stats().items()}
+               if self.memory is not None else {}),
+        }
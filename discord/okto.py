@@ -1,9 +1,49 @@
+import os
 import random
-import string
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+# One wallet: the address is kept as 20 raw bytes on disk and as "0x..." hex here
+WalletRecord = namedtuple("WalletRecord", ["username", "address", "auth_method", "verified"])
+
+AUTH_METHODS = ["google", "otp"]
+
+
+def _address_bytes(address):
+    return bytes.fromhex(address[2:] if address.startswith(("0x", "0X")) else address)
+
+
+def _record(row):
+    username, address, auth_method, verified = row
+    return WalletRecord(username, "0x" + address.hex(), auth_method, bool(verified))
+
 
 class OktoWallet:
-    def __init__(self):
-        self.wallets = {}
+    """
+    Wallet registry backed by SQLite.
+
+    Usernames are the primary key and addresses have their own unique index,
+    so lookups work in both directions without loading everything into memory.
+    Bulk onboarding writes in batched transactions.
+    """
+
+    def __init__(self, path="okto_wallets.sqlite"):
+        """
+        :param path: SQLite file path, or ":memory:" for a throwaway store.
+        """
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS wallets ("
+            " username TEXT PRIMARY KEY, address BLOB NOT NULL,"
+            " auth_method TEXT, verified INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS wallets_by_address ON wallets (address)")
 
     def create_wallet(self, username):
         """
@@ -11,17 +51,86 @@ class OktoWallet:
         :param username: Unique username for the wallet.
         :return: Wallet address.
         """
-        if username in self.wallets:
-            return {"error": "Wallet already exists for this username."}
-        
         wallet_address = self._generate_wallet_address()
-        self.wallets[username] = {
-            "address": wallet_address,
-            "auth_method": None,
-            "verified": False
-        }
+        with self._lock:
+            try:
+                with self._db:
+                    self._db.execute("INSERT INTO wallets (username, address) VALUES (?, ?)",
+                                     (username, _address_bytes(wallet_address)))
+            except sqlite3.IntegrityError:
+                return {"error": "Wallet already exists for this username."}
         return {"message": "Wallet created successfully!", "address": wallet_address}
 
+    def create_wallets_bulk(self, usernames, batch_size=10_000):
+        """
+        Creates wallets for many users at once, e.g. a whole guild.
+        Each batch is one transaction, and existing wallets are left untouched.
+        :param usernames: Iterable of usernames.
+        :param batch_size: Users written per transaction.
+        :return: Created count, existing count, and the new addresses by username.
+        """
+        created, existing = {}, 0
+        batch = []
+        for username in dict.fromkeys(usernames):
+            batch.append(username)
+            if len(batch) >= batch_size:
+                existing += self._create_batch(batch, created)
+                batch = []
+        if batch:
+            existing += self._create_batch(batch, created)
+        return {"message": f"Created {len(created)} wallets.", "created": len(created), "existing": existing,
+                "addresses": created}
+
+    def _create_batch(self, usernames, created):
+        with self._lock:
+            taken = set()
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(usernames), 500):
+                chunk = usernames[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT username FROM wallets WHERE username IN ({','.join('?' * len(chunk))})", chunk
+                )
+                taken.update(username for (username,) in rows)
+            rows = []
+            for username in usernames:
+                if username not in taken:
+                    address = self._generate_wallet_address()
+                    rows.append((username, _address_bytes(address)))
+                    created[username] = address
+            with self._db:
+                self._db.executemany("INSERT INTO wallets (username, address) VALUES (?, ?)", rows)
+        return len(taken)
+
+    def get_wallet(self, username):
+        """
+        :return: WalletRecord for `username`, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT username, address, auth_method, verified FROM wallets WHERE username = ?", (username,)
+            ).fetchone()
+        return _record(row) if row else None
+
+    def find_by_address(self, address):
+        """
+        Reverse lookup from a wallet address to its owner.
+        :param address: "0x"-prefixed hex address (any case).
+        :return: WalletRecord, or None.
+        """
+        try:
+            key = _address_bytes(address)
+        except ValueError:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT username, address, auth_method, verified FROM wallets WHERE address = ?", (key,)
+            ).fetchone()
+        return _record(row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM wallets").fetchone()[0]
+
     def set_auth_method(self, username, auth_method):
         """
         Set the authentication method for the user.
@@ -29,13 +138,14 @@ class OktoWallet:
         :param auth_method: 'google' or 'otp'.
         :return: Success or error message.
         """
-        if username not in self.wallets:
+        if self.get_wallet(username) is None:
             return {"error": "Wallet not found for this username."}
-        
-        if auth_method not in ["google", "otp"]:
+
+        if auth_method not in AUTH_METHODS:
             return {"error": "Invalid authentication method. Choose 'google' or 'otp'."}
-        
-        self.wallets[username]["auth_method"] = auth_method
+
+        with self._lock, self._db:
+            self._db.execute("UPDATE wallets SET auth_method = ? WHERE username = ?", (auth_method, username))
         return {"message": f"Authentication method set to '{auth_method}' for {username}."}
 
     def verify_auth(self, username, code=None):
@@ -45,10 +155,11 @@ class OktoWallet:
         :param code: OTP code, required if using OTP authentication.
         :return: Success or error message.
         """
-        if username not in self.wallets:
+        wallet = self.get_wallet(username)
+        if wallet is None:
             return {"error": "Wallet not found for this username."}
 
-        auth_method = self.wallets[username]["auth_method"]
+        auth_method = wallet.auth_method
         if auth_method is None:
             return {"error": "Authentication method not set."}
 
@@ -61,22 +172,72 @@ class OktoWallet:
                 return {"error": "OTP code required for verification."}
             # Simulate OTP verification
             if code == "123456":  # Replace with your OTP verification logic
-                self.wallets[username]["verified"] = True
+                with self._lock, self._db:
+                    self._db.execute("UPDATE wallets SET verified = 1 WHERE username = ?", (username,))
                 return {"message": "OTP verification successful!"}
             else:
                 return {"error": "Invalid OTP code."}
 
+    def close(self):
+        with self._lock:
+            self._db.close()
+
     def _generate_wallet_address(self):
         """
         Generates a random wallet address.
         :return: Wallet address.
         """
-        return "0x" + ''.join(random.choices(string.hexdigits[:16], k=40))
+        return f"0x{random.getrandbits(160):040x}"
+
+
+def benchmark(members=100_000, directory=None):
+    """
+    Times onboarding `members` users in bulk and looking each one up in both directions,
+    using SQLite files in `directory` (a temporary directory by default).
+    :return: Dictionary of timings.
+    """
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        return _benchmark(members, tmp)
+
+
+def _benchmark(members, directory):
+    wallet = OktoWallet(os.path.join(directory, "bulk.sqlite"))
+    usernames = [f"member_{i}" for i in range(members)]
+
+    start = time.perf_counter()
+    addresses = wallet.create_wallets_bulk(usernames)["addresses"]
+    bulk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for username in usernames:
+        wallet.get_wallet(username)
+    by_username_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for address in addresses.values():
+        wallet.find_by_address(address)
+    by_address_seconds = time.perf_counter() - start
+
+    sample = usernames[:1000]
+    single = OktoWallet(os.path.join(directory, "single.sqlite"))
+    start = time.perf_counter()
+    for username in sample:
+        single.create_wallet(username)
+    per_call_seconds = (time.perf_counter() - start) / len(sample)
+
+    wallet.close()
+    single.close()
+    return {
+        "bulk_create_seconds": bulk_seconds,
+        "single_create_estimate_seconds": per_call_seconds * members,
+        "lookup_by_username_us": by_username_seconds / members * 1e6,
+        "lookup_by_address_us": by_address_seconds / members * 1e6,
+    }
 
 
 # Example Usage:
 if __name__ == "__main__":
-    okto_wallet = OktoWallet()
+    okto_wallet = OktoWallet(":memory:")
 
     # Create a wallet
     result = okto_wallet.create_wallet("user123")
@@ -89,3 +250,13 @@ if __name__ == "__main__":
     # Verify authentication
     verify_result = okto_wallet.verify_auth("user123", code="123456")
     print(verify_result)
+
+    # Reverse lookup
+    print(okto_wallet.find_by_address(result["address"]))
+
+    # Onboard a whole guild at once
+    bulk_result = okto_wallet.create_wallets_bulk(["user123", "user456", "user789"])
+    print(bulk_result["created"], "created,", bulk_result["existing"], "already had a wallet")
+
+    # Benchmark at guild scale
+    print(benchmark(100_000))
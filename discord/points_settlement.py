@@ -0,0 +1,196 @@
+from collections import deque
+
+from tx_submitter import TransactionSubmitter
+
+# Multicall3 is deployed at this address on most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [{
+    "name": "aggregate3", "type": "function", "stateMutability": "payable",
+    "inputs": [{"name": "calls", "type": "tuple[]", "components": [
+        {"name": "target", "type": "address"},
+        {"name": "allowFailure", "type": "bool"},
+        {"name": "callData", "type": "bytes"},
+    ]}],
+    "outputs": [{"name": "returnData", "type": "tuple[]", "components": [
+        {"name": "success", "type": "bool"},
+        {"name": "returnData", "type": "bytes"},
+    ]}],
+}]
+
+SETTLEMENT_MODES = ("batch", "multicall")
+
+
+class PointsSettlement:
+    """
+    Writes many users' point updates in a few transactions.
+
+    In "batch" mode each transaction calls storeUserPointsBatch(userIds, points)
+    on the points contract. In "multicall" mode, for contracts without a batch
+    function, storeUserPoints calls are bundled through Multicall3.aggregate3.
+    The points contract then sees Multicall3 as msg.sender, so it must allow that.
+    Calls are sent with allowFailure=False: a mined transaction means every
+    user in it was stored, and a failing call reverts the batch, which is then
+    split like any other failed batch.
+
+    Batches are sized from gas estimates, so each stays under `gas_fraction` of
+    the block gas limit. A batch that reverts is split in half and retried until
+    the failing users are isolated. Results are reported per user, so only
+    failed users need to be retried.
+    """
+
+    def __init__(self, web3, contract, sender_address, private_key, submitter=None, mode="batch",
+                 max_batch_size=500, gas_fraction=0.5, urgency="medium"):
+        """
+        :param web3: Web3 instance.
+        :param contract: Points contract.
+        :param sender_address: Ethereum address of the sender.
+        :param private_key: Private key of the sender.
+        :param submitter: TransactionSubmitter to send with (its FeeOracle provides gas estimates).
+        :param mode: "batch" (storeUserPointsBatch) or "multicall" (Multicall3 + storeUserPoints).
+        :param max_batch_size: Upper bound on users per transaction.
+        :param gas_fraction: Share of the block gas limit one batch may use.
+        :param urgency: Fee level, "low", "medium" or "high".
+        """
+        if mode not in SETTLEMENT_MODES:
+            raise ValueError(f"Invalid settlement mode. Choose one of: {', '.join(SETTLEMENT_MODES)}")
+        self.web3 = web3
+        self.contract = contract
+        self.sender_address = sender_address
+        self.private_key = private_key
+        self.submitter = submitter or TransactionSubmitter(web3)
+        self.mode = mode
+        self.max_batch_size = max_batch_size
+        self.batch_size = max_batch_size
+        self.gas_fraction = gas_fraction
+        self.urgency = urgency
+        self.multicall = web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        self.counters = {"transactions": 0, "settled": 0, "failed": 0, "splits": 0}
+
+    def _call(self, batch, allow_failure=False):
+        if self.mode == "batch":
+            return self.contract.functions.storeUserPointsBatch([user_id for user_id, _ in batch],
+                                                                [points for _, points in batch])
+        calls = [(self.contract.address, allow_failure,
+                  self.contract.encodeABI(fn_name="storeUserPoints", args=[user_id, points]))
+                 for user_id, points in batch]
+        return self.multicall.functions.aggregate3(calls)
+
+    def _gas_target(self):
+        return int(self.web3.eth.get_block("latest")["gasLimit"] * self.gas_fraction)
+
+    def _fit(self, items, gas_target):
+        """
+        Picks how many of `items` fit in one transaction and adapts the starting size for the next batch.
+        :return: (count, gas limit for those `count` items).
+        """
+        count = min(len(items), self.batch_size)
+        while True:
+            # Estimated directly: the oracle caches by function and calldata size, but a batch's gas depends on whose
+            # storage it writes (new users cost more), so a cached estimate could understate it
+            gas = self._call(items[:count], allow_failure=True).estimate_gas({'from': self.sender_address})
+            if gas <= gas_target or count == 1:
+                break
+            count = max(1, int(count * gas_target / gas * 0.9))
+        if count < len(items) or count == self.batch_size:
+            # A full batch: its gas per user predicts the next one (the tail batch would understate it)
+            per_user = gas / count
+            self.batch_size = max(1, min(self.max_batch_size, int(gas_target / per_user * 0.9)))
+        return count, int(gas * self.submitter.fee_oracle.gas_margin)
+
+    def _drop_failing_calls(self, batch, results):
+        """
+        Multicall mode: simulates the batch and marks users whose call would fail, so they are not sent.
+        """
+        outcomes = self._call(batch, allow_failure=True).call({'from': self.sender_address})
+        sendable = []
+        for (user_id, points), (success, _) in zip(batch, outcomes):
+            if success:
+                sendable.append((user_id, points))
+            else:
+                results[user_id] = {"status": "failed", "points": points, "error": "call reverted in simulation"}
+                self.counters["failed"] += 1
+        return sendable
+
+    def settle(self, updates, urgency=None):
+        """
+        Sends all point updates in as few transactions as the gas limit allows and waits for them.
+        :param updates: Dictionary of user_id -> points.
+        :param urgency: Overrides the fee level for this call.
+        :return: Dictionary of user_id -> {"status": "settled" | "failed", "points", "tx_hash" or "error"}.
+        """
+        results = {}
+        urgency = urgency or self.urgency
+        gas_target = self._gas_target()
+        queue = deque([list(updates.items())])
+        while queue:
+            items = queue.popleft()
+            in_flight = []
+            # Broadcast every batch in this round before waiting for any receipt
+            while items:
+                try:
+                    count, gas = self._fit(items, gas_target)
+                except Exception as e:
+                    # Gas estimation failed: the batch would revert
+                    count = min(len(items), self.batch_size)
+                    self._split_or_fail(items[:count], str(e), queue, results)
+                    items = items[count:]
+                    continue
+                batch, items = items[:count], items[count:]
+                try:
+                    if self.mode == "multicall":
+                        batch = self._drop_failing_calls(batch, results)
+                    if batch:
+                        pending = self.submitter.submit(self._call(batch), self.sender_address, self.private_key,
+                                                        urgency=urgency, gas=gas)
+                        self.counters["transactions"] += 1
+                        in_flight.append((batch, pending))
+                except Exception as e:
+                    self._split_or_fail(batch, str(e), queue, results)
+            for batch, pending in in_flight:
+                try:
+                    receipt = pending.result()
+                    error = None if receipt["status"] == 1 else "transaction reverted"
+                except Exception as e:
+                    receipt, error = None, str(e)
+                if error:
+                    self._split_or_fail(batch, error, queue, results)
+                    continue
+                tx_hash = receipt["transactionHash"]
+                for user_id, points in batch:
+                    results[user_id] = {"status": "settled", "points": points,
+                                        "tx_hash": tx_hash.hex() if hasattr(tx_hash, "hex") else tx_hash}
+                self.counters["settled"] += len(batch)
+        return results
+
+    def _split_or_fail(self, batch, error, queue, results):
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            self.counters["splits"] += 1
+            queue.append(batch[:middle])
+            queue.append(batch[middle:])
+            return
+        user_id, points = batch[0]
+        results[user_id] = {"status": "failed", "points": points, "error": error}
+        self.counters["failed"] += 1
+
+    @staticmethod
+    def failed(results):
+        """
+        :return: Dictionary of user_id -> points for users that were not settled, ready to retry.
+        """
+        return {user_id: result["points"] for user_id, result in results.items() if result["status"] != "settled"}
+
+
+# Example Usage:
+if __name__ == "__main__":
+    from web3 import Web3
+
+    web3 = Web3(Web3.HTTPProvider("https://your_rpc_url"))  # Replace with your provider
+    contract = web3.eth.contract(address=Web3.to_checksum_address("0xYourSmartContractAddress"), abi=[...])
+    settlement = PointsSettlement(web3, contract, "0xYourWalletAddress", "YourPrivateKey", mode="batch")
+
+    results = settlement.settle({"1001": 5, "1002": 3, "1003": 12})
+    print(settlement.counters)
+    retry = PointsSettlement.failed(results)
+    if retry:
+        print(f"Retrying {len(retry)} users: {settlement.settle(retry)}")
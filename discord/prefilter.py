@@ -0,0 +1,247 @@
+import asyncio
+import re
+import time
+import unicodedata
+from collections import deque
+
+ANSWER = "answer"
+IGNORE = "ignore"
+MODERATE = "moderate"
+
+# Greetings and reactions that never need a model reply
+DEFAULT_SMALL_TALK = {"gm", "gn", "gm gm", "hi", "hello", "hey", "lol", "lmao", "ok", "okay", "k", "ty", "thx",
+                      "thanks", "thank you", "nice", "wow", "+1", "same", "yes", "no", "yep", "nope"}
+
+_CUSTOM_EMOJI = re.compile(r"<a?:\w+:\d+>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _is_emoji(char):
+    # Symbols (So) covers pictographs; also count joiners / variation selectors / skin tones
+    return unicodedata.category(char) == "So" or char in "\u200d\ufe0f" or "\U0001F3FB" <= char <= "\U0001F3FF"
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every occurrence of any of the patterns in one pass over the text,
+    however many patterns there are. Matching is case-insensitive; with `whole_words`, matches
+    must not be part of a longer word.
+    """
+
+    def __init__(self, patterns, whole_words=True):
+        self.whole_words = whole_words
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern in patterns:
+            self._add(pattern.casefold())
+        self._build()
+
+    def _add(self, pattern):
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """
+        :return: List of (start, pattern) for every match in `text`.
+        """
+        text = text.casefold()
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                start = index - len(pattern) + 1
+                if self.whole_words and not self._bounded(text, start, index + 1):
+                    continue
+                matches.append((start, pattern))
+        return matches
+
+    @staticmethod
+    def _bounded(text, start, end):
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def search(self, text):
+        """
+        :return: True if any pattern occurs in `text`.
+        """
+        return bool(self.find_all(text))
+
+
+class MergedMessage:
+    """
+    Several rapid messages from one user, presented to the pipeline as one message.
+    `content` is the texts joined by newlines, used as the prompt; every other attribute
+    (id, author, channel, guild, reference, reply(), ...) is the last message's, so replies
+    go where the user last wrote. The originals stay available in `messages`.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.content = "\n".join(message.content for message in messages)
+
+    def __getattr__(self, name):
+        # Only called for attributes not set in __init__
+        return getattr(self.messages[-1], name)
+
+
+class MessagePrefilter:
+    """
+    Cheap local stage in front of the LLM that decides, for each message, whether to answer,
+    ignore or moderate it:
+
+    - moderation terms (Aho-Corasick) -> MODERATE
+    - emoji-only / mostly-emoji messages, small talk ("gm"), very short messages,
+      and the same user repeating the same text -> IGNORE
+    - if trigger keywords are configured, messages without one (and without a
+      question mark) -> IGNORE
+    - everything else -> ANSWER
+
+    Messages to answer go through a per-user debounce: a burst of messages within
+    `debounce_seconds` is merged into one prompt, so one LLM call covers the burst.
+    """
+
+    def __init__(self, moderation_terms=(), trigger_keywords=(), small_talk=None, min_length=3,
+                 max_emoji_ratio=0.5, duplicate_window=120.0, debounce_seconds=2.0, max_debounce=8.0):
+        """
+        :param moderation_terms: Words / phrases that mark a message for moderation.
+        :param trigger_keywords: If given, only messages containing one (or a "?") are answered.
+        :param small_talk: Whole-message phrases to ignore, defaults to DEFAULT_SMALL_TALK.
+        :param min_length: Messages shorter than this (after normalization) are ignored.
+        :param max_emoji_ratio: Messages with a larger share of emoji characters are ignored.
+        :param duplicate_window: Seconds in which a user's repeated message is ignored.
+        :param debounce_seconds: Quiet time after a user's last message before the burst is answered.
+        :param max_debounce: A burst is answered after this many seconds even if the user keeps typing.
+        """
+        self.moderation = AhoCorasick(moderation_terms)
+        self.triggers = AhoCorasick(trigger_keywords) if trigger_keywords else None
+        self.small_talk = {phrase.casefold() for phrase in (DEFAULT_SMALL_TALK if small_talk is None else small_talk)}
+        self.min_length = min_length
+        self.max_emoji_ratio = max_emoji_ratio
+        self.duplicate_window = duplicate_window
+        self.debounce_seconds = debounce_seconds
+        self.max_debounce = max_debounce
+        self._recent = {}   # (channel_id, author_id) -> (normalized text, monotonic time)
+        self._bursts = {}   # (channel_id, author_id) -> [messages, first monotonic time, timer handle]
+        self.counters = {"answered": 0, "ignored": 0, "moderated": 0, "merged": 0}
+        self.reasons = {}
+
+    def classify(self, message):
+        """
+        :param message: discord.Message (uses content, author.id and channel.id).
+        :return: (decision, reason) with decision ANSWER, IGNORE or MODERATE.
+        """
+        decision, reason = self._classify(message)
+        key = {ANSWER: "answered", IGNORE: "ignored", MODERATE: "moderated"}[decision]
+        self.counters[key] += 1
+        if decision == IGNORE:
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return decision, reason
+
+    def _classify(self, message):
+        content = message.content or ""
+        if self.moderation.search(content):
+            return MODERATE, "moderation_term"
+
+        text = _CUSTOM_EMOJI.sub("\u2b50", content)
+        visible = [char for char in text if not char.isspace()]
+        if not visible:
+            return IGNORE, "empty"
+        emoji = sum(1 for char in visible if _is_emoji(char))
+        if emoji / len(visible) > self.max_emoji_ratio:
+            return IGNORE, "emoji"
+
+        normalized = _WHITESPACE.sub(" ", "".join(char for char in text.casefold() if not _is_emoji(char))).strip()
+        if normalized.rstrip("!.") in self.small_talk:
+            return IGNORE, "small_talk"
+        if len(normalized) < self.min_length:
+            return IGNORE, "too_short"
+
+        now = time.monotonic()
+        if len(self._recent) > 10_000:
+            self.prune()
+        key = (message.channel.id, message.author.id)
+        previous = self._recent.get(key)
+        self._recent[key] = (normalized, now)
+        if previous and previous[0] == normalized and now - previous[1] < self.duplicate_window:
+            return IGNORE, "duplicate"
+
+        if self.triggers is not None and "?" not in normalized and not self.triggers.search(normalized):
+            return IGNORE, "no_trigger"
+        return ANSWER, "answer"
+
+    def debounce(self, message, submit):
+        """
+        Holds `message` briefly and merges it with the same user's following messages.
+        Must be called from the event loop.
+        :param submit: Callable(message) run with the message (or a MergedMessage) once the burst ends.
+        """
+        key = (message.channel.id, message.author.id)
+        loop = asyncio.get_running_loop()
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = self._bursts[key] = [[message], loop.time(), None]
+        else:
+            burst[0].append(message)
+            burst[2].cancel()
+            self.counters["merged"] += 1
+        delay = min(self.debounce_seconds, max(0.0, burst[1] + self.max_debounce - loop.time()))
+        burst[2] = loop.call_later(delay, self._release, key, submit)
+
+    def _release(self, key, submit):
+        messages = self._bursts.pop(key)[0]
+        submit(messages[0] if len(messages) == 1 else MergedMessage(messages))
+
+    def prune(self):
+        """
+        Forgets duplicate-detection state older than the duplicate window.
+        """
+        cutoff = time.monotonic() - self.duplicate_window
+        for key in [key for key, (_, seen) in self._recent.items() if seen < cutoff]:
+            del self._recent[key]
+
+    def stats(self):
+        """
+        :return: Decisions, reasons and the number of LLM calls avoided.
+        """
+        saved = self.counters["ignored"] + self.counters["moderated"] + self.counters["merged"]
+        return {**self.counters, "llm_calls_saved": saved, **{f"ignored_{k}": v for k, v in self.reasons.items()}}
+
+
+# Example Usage:
+if __name__ == "__main__":
+    class _Obj:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    prefilter = MessagePrefilter(moderation_terms=["free nitro", "airdrop scam"])
+    for text in ["gm", "🔥🔥🔥", "Claim your FREE NITRO here", "How do I create a wallet?",
+                 "How do I create a wallet?", "ok"]:
+        message = _Obj(content=text, author=_Obj(id=1), channel=_Obj(id=1))
+        print(f"{text!r}: {prefilter.classify(message)}")
+    print(prefilter.stats())
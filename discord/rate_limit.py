@@ -0,0 +1,80 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`.
+    acquire() blocks until a token is available, which spaces requests out
+    instead of letting a burst run into the provider's rate limit.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: Tokens added per second.
+        :param capacity: Maximum burst size, defaults to one second of tokens.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes `tokens` if available without waiting.
+        :return: True if the tokens were taken.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` are available, then takes them.
+        :return: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def delay(self, tokens=1):
+        """
+        :return: Seconds until `tokens` are available (0 if they are now), without taking them.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def update(self, rate=None, tokens=None, capacity=None):
+        """
+        Adjusts the bucket from information the server sent back.
+        :param rate: New refill rate in tokens per second.
+        :param tokens: Tokens actually left according to the server.
+        :param capacity: New maximum burst size, e.g. the server's limit per window.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if rate is not None and rate > 0:
+                self.rate = float(rate)
+            if capacity is not None and capacity > 0:
+                self.capacity = float(capacity)
+            if tokens is not None:
+                self._tokens = min(self.capacity, max(0.0, float(tokens)))
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+SNAPSHOT_VERSION = 1
+
+
+def _canonical(data):
+    """
+    Normalizes snapshot data: list values become sorted, de-duplicated lists, other values are kept.
+    """
+    return {
+        key: sorted(set(value), key=str) if isinstance(value, (list, set, tuple)) else value
+        for key, value in data.items()
+    }
+
+
+def content_hash(data):
+    """
+    :return: SHA-256 hex digest of the canonical JSON form of `data`.
+    """
+    blob = json.dumps(_canonical(data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def diff(previous, current):
+    """
+    Changes from `previous` to `current` (both canonical).
+    List values are diffed as sets. Any other value is stored whole when it changes.
+    :return: (changes, deleted_keys)
+    """
+    changes = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, list) and isinstance(old, list):
+            old_set, new_set = set(old), set(value)
+            added, removed = new_set - old_set, old_set - new_set
+            if added or removed:
+                changes[key] = {"added": sorted(added, key=str), "removed": sorted(removed, key=str)}
+        elif key not in previous or old != value:
+            changes[key] = {"value": value}
+    deleted = sorted(key for key in previous if key not in current)
+    return changes, deleted
+
+
+def apply(state, changes, deleted=()):
+    """
+    Applies one delta from diff() to `state` in place.
+    """
+    for key, change in changes.items():
+        if "value" in change:
+            state[key] = change["value"]
+        else:
+            members = set(state.get(key, []))
+            members.difference_update(change["removed"])
+            members.update(change["added"])
+            state[key] = sorted(members, key=str)
+    for key in deleted:
+        state.pop(key, None)
+    return state
+
+
+PreparedSnapshot = namedtuple("PreparedSnapshot", ["cid", "prev", "hash", "depth", "state"])
+
+
+class SnapshotChain:
+    """
+    Incremental, deduplicated snapshots on IPFS.
+
+    Each snapshot stores only the delta from the previous one and links to its
+    CID ("prev"). A full snapshot is written every `full_every` deltas, so a
+    reader never walks more than that many links. The head CID, its content
+    hash and the last state are kept in a local JSON file. When the new data
+    hashes the same as the head, nothing is uploaded and no transaction is needed.
+
+    When the CID is recorded on-chain, use prepare() to upload and commit() once
+    the transaction succeeded, so a failed transaction never moves the local
+    head (the next run then publishes the same change again).
+    """
+
+    def __init__(self, ipfs, state_path="snapshot_state.json", full_every=50):
+        """
+        :param ipfs: ipfshttpclient client.
+        :param state_path: Local file holding the head CID, its content hash and state.
+        :param full_every: Deltas between full snapshots.
+        """
+        self.ipfs = ipfs
+        self.state_path = state_path
+        self.full_every = full_every
+        self.head = None
+        self.head_hash = None
+        self.depth = 0      # deltas since the last full snapshot
+        self.state = {}
+        self._documents = {}
+        self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path) as f:
+            saved = json.load(f)
+        self.head = saved["head"]
+        self.head_hash = saved["hash"]
+        self.depth = saved["depth"]
+        self.state = saved["state"]
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"head": self.head, "hash": self.head_hash, "depth": self.depth, "state": self.state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def prepare(self, data):
+        """
+        Uploads a snapshot of `data` if it differs from the head, without moving the head.
+        :param data: Dictionary of lists (treated as sets) and plain values.
+        :return: PreparedSnapshot to pass to commit(), or None when nothing changed.
+        """
+        current = _canonical(data)
+        digest = content_hash(current)
+        if digest == self.head_hash:
+            return None
+
+        document = {"version": SNAPSHOT_VERSION, "prev": self.head, "hash": digest}
+        if self.head is None or self.depth + 1 >= self.full_every:
+            document["full"] = current
+            depth = 0
+        else:
+            changes, deleted = diff(self.state, current)
+            document["changes"] = changes
+            document["deleted"] = deleted
+            depth = self.depth + 1
+
+        cid = self.ipfs.add_str(json.dumps(document, separators=(",", ":")))
+        self._documents[cid] = document
+        return PreparedSnapshot(cid, self.head, digest, depth, current)
+
+    def commit(self, prepared):
+        """
+        Makes a prepared snapshot the head and persists it, e.g. after its on-chain transaction succeeded.
+        :return: False if the head moved since the snapshot was prepared (it is not committed then).
+        """
+        if prepared.prev != self.head:
+            print(f"Snapshot {prepared.cid} was prepared on an old head, not committing it")
+            return False
+        self.head, self.head_hash, self.depth, self.state = prepared.cid, prepared.hash, prepared.depth, prepared.state
+        self._save_state()
+        return True
+
+    def publish(self, data):
+        """
+        Uploads a snapshot of `data` if it differs from the head and commits it at once.
+        :return: (cid, changed). When nothing changed, the head CID and False.
+        """
+        prepared = self.prepare(data)
+        if prepared is None:
+            return self.head, False
+        self.commit(prepared)
+        return prepared.cid, True
+
+    def _document(self, cid):
+        document = self._documents.get(cid)
+        if document is None:
+            document = self._documents[cid] = json.loads(self.ipfs.cat(cid))
+        return document
+
+    def load(self, cid=None):
+        """
+        Rebuilds the full data of snapshot `cid` by walking back to the last full snapshot and replaying deltas.
+        :param cid: Snapshot CID, defaults to the local head.
+        :return: Dictionary of the snapshot's data.
+        """
+        cid = cid or self.head
+        if cid is None:
+            return {}
+        chain = []
+        document = self._document(cid)
+        while "full" not in document:
+            chain.append(document)
+            if document["prev"] is None:
+                raise ValueError(f"Snapshot chain from {cid} has no full snapshot")
+            document = self._document(document["prev"])
+        state = json.loads(json.dumps(document["full"]))
+        for delta in reversed(chain):
+            apply(state, delta["changes"], delta["deleted"])
+        expected = self._document(cid)["hash"]
+        if content_hash(state) != expected:
+            raise ValueError(f"Snapshot {cid} does not match its content hash")
+        return state
+
+    def history(self, cid=None):
+        """
+        Yields (cid, document) from `cid` (default head) back to the first snapshot.
+        """
+        cid = cid or self.head
+        while cid is not None:
+            document = self._document(cid)
+            yield cid, document
+            cid = document["prev"]
@@ -1,8 +1,28 @@
-import requests
+import async_transport
+import transport
 
 class SolanaModule:
-    def __init__(self, rpc_url):
+    def __init__(self, rpc_url, cache=None):
+        """
+        :param rpc_url: Solana RPC URL.
+        :param cache: Optional block_cache.FinalizedBlockCache; finalized blocks are
+                      then served from it instead of the RPC.
+        """
         self.rpc_url = rpc_url
+        self.cache = cache
+        if cache is not None and cache.head_fn is None:
+            cache.head_fn = self.get_finalized_slot
+
+    def get_finalized_slot(self):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getSlot",
+            "params": [{"commitment": "finalized"}]
+        }
+        response = transport.post(self.rpc_url, json=payload)
+        response.raise_for_status()
+        return response.json()["result"]
 
     def get_account_info(self, pubkey):
         payload = {
@@ -11,19 +31,107 @@ class SolanaModule:
             "method": "getAccountInfo",
             "params": [pubkey]
         }
-        response = requests.post(self.rpc_url, json=payload)
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch account info: {response.status_code}"}
+
+    def get_block(self, slot, transaction_details=None, encoding=None, rewards=None):
+        """
+        Fetches the block at `slot`.
+        :param slot: Slot number.
+        :param transaction_details: "full", "accounts", "signatures" or "none"; node default is "full".
+        :param encoding: "json", "jsonParsed", "base58" or "base64".
+        :param rewards: Whether to include block rewards.
+        :return: Block details or error message.
+        """
+        config = {
+            key: value for key, value in (
+                ("transactionDetails", transaction_details),
+                ("encoding", encoding),
+                ("rewards", rewards),
+            ) if value is not None
+        }
+        if config:
+            # Versioned transactions are rejected unless the caller opts in.
+            config["maxSupportedTransactionVersion"] = 0
+        if self.cache is not None:
+            key = slot if not config else f"{slot}:{transaction_details}:{encoding}:{rewards}"
+            return self.cache.fetch("block", key, lambda: self._fetch_block(slot, config), lambda block: slot)
+        return self._fetch_block(slot, config)
+
+    def _fetch_block(self, slot, config=None):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getBlock",
+            "params": [slot, config] if config else [slot]
+        }
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch block info: {response.status_code}"}
+
+    def get_blocks(self, start_slot, end_slot=None):
+        """
+        Lists the slots between `start_slot` and `end_slot` (inclusive) that have a confirmed block.
+        The node limits the range to 500,000 slots.
+        :return: List of slots or error message.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getBlocks",
+            "params": [start_slot] if end_slot is None else [start_slot, end_slot]
+        }
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch blocks: {response.status_code}"}
+
+    def get_blocks_with_limit(self, start_slot, limit):
+        """
+        Lists up to `limit` slots with a confirmed block, starting at `start_slot`.
+        :return: List of slots or error message.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getBlocksWithLimit",
+            "params": [start_slot, limit]
+        }
+        response = transport.post(self.rpc_url, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"Failed to fetch blocks: {response.status_code}"}
+
+class AsyncSolanaModule:
+    """
+    asyncio version of SolanaModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        self.rpc_url = rpc_url
+
+    async def get_account_info(self, pubkey):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getAccountInfo",
+            "params": [pubkey]
+        }
+        response = await async_transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch account info: {response.status_code}"}
 
-    def get_block(self, slot):
+    async def get_block(self, slot):
         payload = {
             "jsonrpc": "2.0",
             "id": 1,
             "method": "getBlock",
             "params": [slot]
         }
-        response = requests.post(self.rpc_url, json=payload)
+        response = await async_transport.post(self.rpc_url, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch block info: {response.status_code}"}
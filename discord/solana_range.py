@@ -0,0 +1,109 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import TokenBucket
+
+# getBlocks accepts at most this many slots per call
+MAX_SLOT_RANGE = 500_000
+# Errors the RPC returns for slots that have no block (skipped, or pruned from storage)
+SKIPPED_SLOT_ERRORS = {-32007, -32009}
+
+
+class SolanaRangeFetcher:
+    """
+    Fetches every block in a slot range from a SolanaModule.
+
+    getBlocks lists the slots that actually contain a block, so skipped
+    slots are never requested. Those blocks are then fetched concurrently
+    by a thread pool, with every request taking a token from a shared
+    rate limiter.
+    """
+
+    def __init__(self, module, max_workers=8, requests_per_second=40, burst=None):
+        """
+        :param module: SolanaModule to fetch with.
+        :param max_workers: Blocks fetched concurrently.
+        :param requests_per_second: Rate limit shared by all workers.
+        :param burst: Maximum burst size, defaults to one second of requests.
+        """
+        self.module = module
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(requests_per_second, burst)
+        self.counters = {"blocks": 0, "skipped": 0, "errors": 0}
+
+    def slots_with_blocks(self, start_slot, end_slot):
+        """
+        Lists the slots in [start_slot, end_slot] that have a block, in 500k-slot pages.
+        :return: Generator of slot numbers.
+        """
+        page_start = start_slot
+        while page_start <= end_slot:
+            page_end = min(end_slot, page_start + MAX_SLOT_RANGE - 1)
+            self.limiter.acquire()
+            response = self.module.get_blocks(page_start, page_end)
+            if "result" not in response:
+                raise RuntimeError(f"getBlocks {page_start}-{page_end} failed: {response.get('error')}")
+            yield from response["result"]
+            page_start = page_end + 1
+
+    def _fetch(self, slot, options):
+        self.limiter.acquire()
+        return slot, self.module.get_block(slot, **options)
+
+    def fetch(self, start_slot, end_slot, transaction_details=None, encoding=None, rewards=None):
+        """
+        Yields (slot, block) for every block in [start_slot, end_slot], in slot order.
+        At most 2 * max_workers requests are queued at a time, so memory stays bounded.
+        :param transaction_details: "full", "accounts", "signatures" or "none".
+        :param encoding: "json", "jsonParsed", "base58" or "base64".
+        :param rewards: Whether to include block rewards.
+        :return: Generator of (slot, block result) pairs. Slots that fail are counted and skipped.
+        """
+        options = {"transaction_details": transaction_details, "encoding": encoding, "rewards": rewards}
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for slot in self.slots_with_blocks(start_slot, end_slot):
+                in_flight.append((slot, pool.submit(self._fetch, slot, options)))
+                if len(in_flight) >= 2 * self.max_workers:
+                    yield from self._collect(*in_flight.popleft())
+            while in_flight:
+                yield from self._collect(*in_flight.popleft())
+
+    def _collect(self, slot, future):
+        try:
+            _, response = future.result()
+        except Exception as e:
+            # Transport failure after the session's retries (timeout, connection error)
+            self.counters["errors"] += 1
+            print(f"Failed to fetch Solana slot {slot}: {e}")
+            return
+        if "result" in response and response["result"] is not None:
+            self.counters["blocks"] += 1
+            yield slot, response["result"]
+            return
+        error = response.get("error")
+        if isinstance(error, dict) and error.get("code") in SKIPPED_SLOT_ERRORS:
+            self.counters["skipped"] += 1
+        else:
+            self.counters["errors"] += 1
+            print(f"Failed to fetch Solana slot {slot}: {error}")
+
+    def signatures(self, start_slot, end_slot):
+        """
+        Yields (slot, [signatures]) for the range without downloading full transactions.
+        """
+        for slot, block in self.fetch(start_slot, end_slot, transaction_details="signatures", rewards=False):
+            yield slot, block.get("signatures", [])
+
+
+# Example Usage:
+if __name__ == "__main__":
+    from sol import SolanaModule
+
+    solana = SolanaModule("https://api.mainnet-beta.solana.com")
+    fetcher = SolanaRangeFetcher(solana, max_workers=8, requests_per_second=10)
+
+    finalized = solana.get_finalized_slot()
+    for slot, signatures in fetcher.signatures(finalized - 100, finalized):
+        print(slot, len(signatures), "signatures")
+    print(fetcher.counters)
@@ -1,4 +1,5 @@
-import requests
+import async_transport
+import transport
 
 class SuiModule:
     def __init__(self, rpc_url):
@@ -16,7 +17,7 @@ class SuiModule:
         """
         endpoint = f"{self.rpc_url}/getObject"
         payload = {"object_id": object_id}
-        response = requests.post(endpoint, json=payload)
+        response = transport.post(endpoint, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch object info: {response.status_code}"}
@@ -29,7 +30,7 @@ class SuiModule:
         """
         endpoint = f"{self.rpc_url}/getAddressInfo"
         payload = {"address": address}
-        response = requests.post(endpoint, json=payload)
+        response = transport.post(endpoint, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch account info: {response.status_code}"}
@@ -40,7 +41,7 @@ class SuiModule:
         :return: Latest checkpoint info as a dictionary or an error message.
         """
         endpoint = f"{self.rpc_url}/getLatestCheckpoint"
-        response = requests.post(endpoint, json={})
+        response = transport.post(endpoint, json={})
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch latest checkpoint info: {response.status_code}"}
@@ -53,12 +54,47 @@ class SuiModule:
         """
         endpoint = f"{self.rpc_url}/getTransaction"
         payload = {"transaction_digest": transaction_digest}
-        response = requests.post(endpoint, json=payload)
+        response = transport.post(endpoint, json=payload)
         if response.status_code == 200:
             return response.json()
         return {"error": f"Failed to fetch transaction info: {response.status_code}"}
 
 
+
+class AsyncSuiModule:
+    """
+    asyncio version of SuiModule with the same methods, for use from bot cogs.
+    """
+    def __init__(self, rpc_url):
+        """
+        Initialize the module with the Sui RPC URL.
+        :param rpc_url: The URL of the Sui RPC endpoint.
+        """
+        self.rpc_url = rpc_url
+
+    async def _post(self, endpoint, payload, error_message):
+        response = await async_transport.post(endpoint, json=payload)
+        if response.status_code == 200:
+            return response.json()
+        return {"error": f"{error_message}: {response.status_code}"}
+
+    async def get_object_info(self, object_id):
+        return await self._post(f"{self.rpc_url}/getObject", {"object_id": object_id},
+                                "Failed to fetch object info")
+
+    async def get_account_info(self, address):
+        return await self._post(f"{self.rpc_url}/getAddressInfo", {"address": address},
+                                "Failed to fetch account info")
+
+    async def get_latest_checkpoint(self):
+        return await self._post(f"{self.rpc_url}/getLatestCheckpoint", {},
+                                "Failed to fetch latest checkpoint info")
+
+    async def get_transaction(self, transaction_digest):
+        return await self._post(f"{self.rpc_url}/getTransaction", {"transaction_digest": transaction_digest},
+                                "Failed to fetch transaction info")
+
+
 # Example Usage:
 if __name__ == "__main__":
     # Replace with your Sui RPC URL
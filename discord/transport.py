@@ -0,0 +1,135 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP transport settings for every chain module.
+# Change these (or call configure_transport) before the first request is sent.
+TRANSPORT_CONFIG = {
+    "pool_connections": 16,   # Number of distinct hosts to keep pools for
+    "pool_maxsize": 32,       # Keep-alive connections kept per host
+    "pool_block": False,      # Block instead of opening extra connections when a host pool is full
+    "connect_timeout": 5.0,   # Seconds to wait for the TCP/TLS handshake
+    "read_timeout": 30.0,     # Seconds to wait for the response body
+    "max_retries": 3,         # Retries on connection errors and retryable status codes
+    "backoff_factor": 0.5,    # Sleeps 0.5s, 1s, 2s, ... between retries
+    "retry_statuses": (429, 500, 502, 503, 504),
+    # Used by the asyncio clients (see async_transport.py)
+    "async_pool_limit": 512,        # Total open connections across all hosts
+    "endpoint_concurrency": 64,     # Requests in flight per endpoint
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure_transport(**overrides):
+    """
+    Updates the shared transport settings and drops the current session so the
+    next request builds a new one with the new settings.
+    :param overrides: Any keys of TRANSPORT_CONFIG.
+    :return: The updated configuration.
+    """
+    global _session
+    unknown = set(overrides) - set(TRANSPORT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown transport settings: {', '.join(sorted(unknown))}")
+
+    with _session_lock:
+        TRANSPORT_CONFIG.update(overrides)
+        if _session is not None:
+            _session.close()
+            _session = None
+    return dict(TRANSPORT_CONFIG)
+
+
+def _build_session(config=None):
+    """
+    Builds a requests session with keep-alive pooling and retry/backoff.
+    :param config: Settings to use, defaults to TRANSPORT_CONFIG.
+    :return: A configured requests.Session.
+    """
+    config = config or TRANSPORT_CONFIG
+    retry = Retry(
+        total=config["max_retries"],
+        backoff_factor=config["backoff_factor"],
+        status_forcelist=config["retry_statuses"],
+        # Chain RPC reads are idempotent, so POST is safe to retry as well.
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config["pool_connections"],
+        pool_maxsize=config["pool_maxsize"],
+        pool_block=config["pool_block"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide pooled session, creating it on first use.
+    :return: The shared requests.Session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def new_session(**overrides):
+    """
+    Builds a separate pooled session with some settings overridden, for a client
+    that needs different behaviour, e.g. one that handles 429 responses itself.
+    The caller owns the session and closes it.
+    :param overrides: Any keys of TRANSPORT_CONFIG.
+    :return: A configured requests.Session.
+    """
+    unknown = set(overrides) - set(TRANSPORT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown transport settings: {', '.join(sorted(unknown))}")
+    return _build_session(dict(TRANSPORT_CONFIG, **overrides))
+
+
+def _with_timeout(kwargs):
+    kwargs.setdefault("timeout", (TRANSPORT_CONFIG["connect_timeout"], TRANSPORT_CONFIG["read_timeout"]))
+    return kwargs
+
+
+def post(url, **kwargs):
+    """
+    Sends a POST request over the shared pooled session.
+    :param url: Target URL.
+    :param kwargs: Extra arguments for requests (json, headers, timeout, ...).
+    :return: requests.Response.
+    """
+    return get_session().post(url, **_with_timeout(kwargs))
+
+
+def get(url, **kwargs):
+    """
+    Sends a GET request over the shared pooled session.
+    :param url: Target URL.
+    :param kwargs: Extra arguments for requests (params, headers, timeout, ...).
+    :return: requests.Response.
+    """
+    return get_session().get(url, **_with_timeout(kwargs))
+
+
+def close_transport():
+    """
+    Closes all pooled connections. The next request opens a fresh session.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
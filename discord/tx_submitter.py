@@ -0,0 +1,298 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from web3.exceptions import TransactionNotFound
+
+from fee_oracle import FeeOracle
+
+
+class DroppedTransactionError(Exception):
+    """Raised on a pending transaction whose nonce was consumed by a transaction we did not send."""
+
+
+class NonceManager:
+    """
+    Hands out nonces per sender from a local counter so transactions can be
+    sent back to back without waiting for the previous one to be mined.
+
+    Nonces reserved but not yet broadcast are tracked. A resync never moves
+    the counter below one of them, and a nonce whose broadcast failed is
+    reused before any new one, so other threads' reservations stay unique
+    and no gap is left behind.
+    """
+
+    def __init__(self, web3):
+        self.web3 = web3
+        self._next = {}
+        self._reserved = {}   # sender -> nonces handed out but not yet broadcast
+        self._free = {}       # sender -> nonces released after a failed broadcast, reused first
+        self._lock = threading.Lock()
+
+    def reserve(self, sender):
+        """
+        Returns the next nonce for `sender`. Call confirm() once it is broadcast or release() if it was not.
+        The counter is seeded from the node's pending transaction count.
+        """
+        with self._lock:
+            if sender not in self._next:
+                self._next[sender] = self.web3.eth.get_transaction_count(sender, "pending")
+            free = self._free.setdefault(sender, set())
+            if free:
+                nonce = min(free)
+                free.discard(nonce)
+            else:
+                nonce = self._next[sender]
+                self._next[sender] += 1
+            self._reserved.setdefault(sender, set()).add(nonce)
+            return nonce
+
+    def confirm(self, sender, nonce):
+        """
+        Marks a reserved nonce as broadcast.
+        """
+        with self._lock:
+            self._reserved.get(sender, set()).discard(nonce)
+
+    def release(self, sender, nonce):
+        """
+        Returns a reserved nonce whose transaction was not broadcast, and resyncs with the node.
+        """
+        with self._lock:
+            self._reserved.get(sender, set()).discard(nonce)
+            self._free.setdefault(sender, set()).add(nonce)
+            return self._resync(sender)
+
+    def resync(self, sender):
+        """
+        Reloads the counter from the node, e.g. after a "nonce too low" error or a
+        transaction sent outside this process. Reserved nonces are kept.
+        """
+        with self._lock:
+            return self._resync(sender)
+
+    def _resync(self, sender):
+        node_count = self.web3.eth.get_transaction_count(sender, "pending")
+        reserved = self._reserved.get(sender, set())
+        free = {nonce for nonce in self._free.get(sender, set()) if nonce >= node_count}
+        if not reserved:
+            # Nothing outstanding: the node's count is authoritative
+            self._next[sender] = node_count
+            free = set()
+        else:
+            self._next[sender] = max(node_count, max(reserved) + 1, self._next.get(sender, node_count))
+        self._free[sender] = free
+        return self._next[sender]
+
+
+class PendingTransaction:
+    """
+    A signed transaction that has been broadcast but not yet confirmed.
+    `future` resolves to the receipt once the background tracker sees it mined.
+    """
+
+    def __init__(self, sender, nonce, tx, private_key, tx_hash, contract_function=None, urgency="medium"):
+        self.sender = sender
+        self.nonce = nonce
+        self.tx = tx
+        self.private_key = private_key
+        self.contract_function = contract_function
+        self.urgency = urgency
+        self.tx_hashes = [tx_hash]    # Every hash broadcast for this nonce, newest last
+        self.sent_at = time.monotonic()
+        self.replacements = 0
+        self.missing_receipt_polls = 0
+        self.future = Future()
+
+    @property
+    def tx_hash(self):
+        return self.tx_hashes[-1]
+
+    def result(self, timeout=None):
+        """
+        Blocks until the transaction is mined.
+        :return: Transaction receipt.
+        """
+        return self.future.result(timeout)
+
+
+class TransactionSubmitter:
+    """
+    Pipelined transaction submission.
+
+    submit() signs and broadcasts immediately using a locally tracked nonce and
+    returns a PendingTransaction. A single background thread tracks all pending
+    transactions: it resolves receipts, rebroadcasts transactions the node has
+    forgotten, replaces stuck ones with higher fees, and resyncs the
+    nonce counter when a nonce turns out to be taken.
+    """
+
+    def __init__(self, web3, fee_oracle=None, poll_interval=2.0, stuck_after=120.0, gas_price_bump=1.125,
+                 max_replacements=5, receipt_grace_polls=5):
+        """
+        :param web3: Web3 instance.
+        :param fee_oracle: FeeOracle for gas limits and fees, shared between submitters; one is created if not given.
+        :param poll_interval: Seconds between receipt checks.
+        :param stuck_after: Seconds before an unmined transaction is rebroadcast or replaced.
+        :param gas_price_bump: Fee multiplier for replacements (nodes require at least +10%).
+        :param max_replacements: Give up replacing a transaction after this many attempts.
+        :param receipt_grace_polls: Polls to keep looking for a receipt once the nonce is used, before
+                                    the transaction is declared dropped (receipts can lag behind the count).
+        """
+        self.web3 = web3
+        self.nonces = NonceManager(web3)
+        self.fee_oracle = fee_oracle or FeeOracle(web3)
+        self.poll_interval = poll_interval
+        self.stuck_after = stuck_after
+        self.gas_price_bump = gas_price_bump
+        self.max_replacements = max_replacements
+        self.receipt_grace_polls = receipt_grace_polls
+        self._pending = {}    # (sender, nonce) -> PendingTransaction
+        self._lock = threading.Lock()
+        self._tracker = None
+
+    def submit(self, contract_function, sender_address, private_key, urgency="medium", gas=None):
+        """
+        Builds, signs and broadcasts a contract call without waiting for it to be mined.
+        :param contract_function: Bound contract function, e.g. contract.functions.storeData(cid).
+        :param sender_address: Ethereum address of the sender.
+        :param private_key: Private key of the sender.
+        :param urgency: "low", "medium" or "high"; picks the fee level from the fee oracle.
+        :param gas: Gas limit to use instead of the fee oracle's estimate.
+        :return: PendingTransaction.
+        """
+        tx_fields = {'from': sender_address,
+                     **self.fee_oracle.tx_params(contract_function, sender_address, urgency, gas=gas)}
+        for attempt in range(2):
+            nonce = self.nonces.reserve(sender_address)
+            try:
+                tx = contract_function.build_transaction(dict(tx_fields, nonce=nonce))
+                tx_hash = self._sign_and_send(tx, private_key)
+            except Exception as e:
+                # Nothing was broadcast for this nonce: hand it back so it is reused and no gap is left.
+                self.nonces.release(sender_address, nonce)
+                if attempt == 0 and isinstance(e, ValueError) and "nonce too low" in str(e).lower():
+                    continue
+                raise
+            self.nonces.confirm(sender_address, nonce)
+            pending = PendingTransaction(sender_address, nonce, tx, private_key, tx_hash, contract_function, urgency)
+            with self._lock:
+                self._pending[(sender_address, nonce)] = pending
+            self._ensure_tracker()
+            return pending
+
+    def _sign_and_send(self, tx, private_key):
+        signed_tx = self.web3.eth.account.sign_transaction(tx, private_key)
+        return self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def wait_all(self, timeout=None):
+        """
+        Waits for every currently pending transaction.
+        :return: List of receipts (or exceptions) in submission order.
+        """
+        with self._lock:
+            pending = sorted(self._pending.values(), key=lambda p: (p.sender, p.nonce))
+        results = []
+        for item in pending:
+            try:
+                results.append(item.result(timeout))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _ensure_tracker(self):
+        with self._lock:
+            if self._tracker is None or not self._tracker.is_alive():
+                self._tracker = threading.Thread(target=self._track, name="tx-tracker", daemon=True)
+                self._tracker.start()
+
+    def _track(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._pending:
+                    self._tracker = None
+                    return
+                by_sender = {}
+                for pending in self._pending.values():
+                    by_sender.setdefault(pending.sender, []).append(pending)
+            for sender, items in by_sender.items():
+                try:
+                    self._poll_sender(sender, items)
+                except Exception as e:
+                    print(f"Transaction tracker error for {sender}: {e}")
+
+    def _poll_sender(self, sender, items):
+        # One call tells us which of this sender's nonces are already used on-chain.
+        mined_count = self.web3.eth.get_transaction_count(sender, "latest")
+        for pending in sorted(items, key=lambda p: p.nonce):
+            if pending.nonce < mined_count:
+                self._resolve(pending)
+            elif time.monotonic() - pending.sent_at >= self.stuck_after:
+                self._unstick(pending)
+
+    def _resolve(self, pending):
+        for tx_hash in reversed(pending.tx_hashes):
+            try:
+                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            self._finish(pending)
+            self.fee_oracle.record_receipt(pending.tx, receipt, pending.urgency)
+            if receipt["status"] == 0 and receipt["gasUsed"] >= pending.tx["gas"] and pending.contract_function:
+                # Ran out of gas: the cached estimate is too low for this call.
+                self.fee_oracle.invalidate_estimate(pending.contract_function, pending.sender)
+            pending.future.set_result(receipt)
+            return
+        # The nonce is used but no receipt for our hashes yet: the node may not have indexed it
+        pending.missing_receipt_polls += 1
+        if pending.missing_receipt_polls <= self.receipt_grace_polls:
+            return
+        # Still nothing: something else took the nonce.
+        self._finish(pending)
+        self.nonces.resync(pending.sender)
+        pending.future.set_exception(DroppedTransactionError(
+            f"Nonce {pending.nonce} of {pending.sender} was used by another transaction"
+        ))
+
+    def _unstick(self, pending):
+        try:
+            self.web3.eth.get_transaction(pending.tx_hash)
+            known = True
+        except TransactionNotFound:
+            known = False
+
+        if not known:
+            # Dropped from the mempool: rebroadcast as-is so later nonces are not blocked.
+            try:
+                self._sign_and_send(pending.tx, pending.private_key)
+            except Exception as e:
+                # "already known", "underpriced", or mined meanwhile: the next poll sorts it out
+                print(f"Rebroadcast of nonce {pending.nonce} of {pending.sender} rejected: {e}")
+        elif pending.replacements < self.max_replacements:
+            pending.tx = self._bumped(pending.tx)
+            try:
+                pending.tx_hashes.append(self._sign_and_send(pending.tx, pending.private_key))
+                pending.replacements += 1
+            except Exception as e:
+                # The original may have been mined in the meantime; the next poll resolves it.
+                print(f"Replacement for nonce {pending.nonce} of {pending.sender} rejected: {e}")
+        pending.sent_at = time.monotonic()
+
+    def _bumped(self, tx):
+        """
+        Copy of `tx` with fees raised enough for the node to accept it as a replacement.
+        """
+        bump = lambda value: int(value * self.gas_price_bump) + 1
+        if 'maxFeePerGas' in tx:
+            return dict(tx, maxFeePerGas=bump(tx['maxFeePerGas']),
+                        maxPriorityFeePerGas=bump(tx['maxPriorityFeePerGas']))
+        return dict(tx, gasPrice=bump(tx['gasPrice']))
+
+    def _finish(self, pending):
+        with self._lock:
+            self._pending.pop((pending.sender, pending.nonce), None)
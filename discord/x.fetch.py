@@ -5,6 +5,10 @@ from dotenv import load_dotenv
 from requests_oauthlib import OAuth2Session
 from oauthlib.oauth2 import WebApplicationClient
 
+from fee_oracle import FeeOracle
+from points_settlement import PointsSettlement
+from tx_submitter import TransactionSubmitter
+
 # Load environment variables
 load_dotenv()
 
@@ -28,6 +32,13 @@ PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 web3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
 contract = web3.eth.contract(address=Web3.toChecksumAddress(CONTRACT_ADDRESS), abi=CONTRACT_ABI)
 
+# One fee oracle for this chain: its gas estimates, fee samples and metrics are shared
+fee_oracle = FeeOracle(web3)
+# Tracks nonces locally so point uploads can be sent back to back
+submitter = TransactionSubmitter(web3, fee_oracle=fee_oracle)
+# Writes many users' points per transaction (storeUserPointsBatch)
+settlement = PointsSettlement(web3, contract, SENDER_ADDRESS, PRIVATE_KEY, submitter=submitter)
+
 # Initialize OAuth2 Client
 client = WebApplicationClient(CLIENT_ID)
 
@@ -82,20 +93,33 @@ def check_user_interactions(posts):
             points += 1
     return points
 
-def upload_data_to_smart_contract(points, user_id):
+def upload_data_to_smart_contract(points, user_id, wait=True, urgency="medium"):
     """
     Upload user points to a smart contract on Ethereum.
+    With wait=False the transaction is only broadcast and a PendingTransaction is
+    returned, so many users can be uploaded without waiting a block for each.
+    Gas and fees come from the shared fee oracle at the given urgency.
     """
     # Create the transaction to store data on the blockchain
-    tx = contract.functions.storeUserPoints(user_id, points).build_transaction({
-        'from': SENDER_ADDRESS,
-        'nonce': web3.eth.get_transaction_count(SENDER_ADDRESS),
-        'gas': 3000000,
-        'gasPrice': web3.toWei('20', 'gwei')
-    })
-    signed_tx = web3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-    return web3.eth.wait_for_transaction_receipt(tx_hash)
+    pending = submitter.submit(contract.functions.storeUserPoints(user_id, points), SENDER_ADDRESS, PRIVATE_KEY,
+                               urgency=urgency)
+    return pending.result() if wait else pending
+
+def upload_point_deltas(scorer, urgency="medium"):
+    """
+    Uploads only the points each user earned since the last upload, as tracked by an InteractionScorer.
+    Deltas are written in a few gas-sized batch transactions; settled users are marked so they are
+    not sent again, and failed users stay pending for the next run.
+    :return: Per-user settlement results.
+    """
+    deltas = scorer.pending_deltas()
+    results = settlement.settle(deltas, urgency=urgency)
+    scorer.mark_settled({user_id: result["points"] for user_id, result in results.items()
+                         if result["status"] == "settled"})
+    for user_id, result in results.items():
+        if result["status"] != "settled":
+            print(f"Points upload for {user_id} failed, will retry next run: {result['error']}")
+    return results
 
 def main():
     """
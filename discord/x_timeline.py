@@ -0,0 +1,319 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import transport
+from rate_limit import TokenBucket
+
+POSTS_URL = "https://api.x.com/2/timeline/home"
+# Requests per second allowed per endpoint across all users, before the API's own headers are seen
+DEFAULT_ENDPOINT_RATES = {POSTS_URL: 50}
+
+
+def _access_token(token):
+    return token["access_token"] if isinstance(token, dict) else token
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when a user's rate-limit window has no requests left; `retry_at` is the epoch time to try again.
+    `rejected` is True when the API answered 429, False when the request was held back locally.
+    """
+
+    def __init__(self, message, retry_at, rejected=False):
+        super().__init__(message)
+        self.retry_at = retry_at
+        self.rejected = rejected
+
+
+class TimelineJob:
+    """
+    One user's timeline fetch in progress: the pages fetched so far and where to continue.
+    A job that hits a rate limit is put aside and resumed from its pagination token later.
+    """
+
+    def __init__(self, user_id, token, url, since_id=None, max_pages=10, page_size=100):
+        self.user_id = user_id
+        self.token = token
+        self.url = url
+        self.params = {"max_results": page_size}
+        if since_id is not None:
+            self.params["since_id"] = since_id
+        self.pages_left = max_pages
+        self.posts = []
+        self.done = False
+        self.complete = False    # True once pagination ran out (reached since_id), not just max_pages
+        self.retry_at = 0.0
+        self.rate_limited = 0
+
+    @property
+    def next_token(self):
+        """
+        Pagination token to resume from when the job stopped at max_pages, else None.
+        """
+        return None if self.complete else self.params.get("pagination_token")
+
+
+class XTimelineFetcher:
+    """
+    Fetches X.com timelines for many authorized users at once.
+
+    - Each user's timeline is a stream of pages that follows meta.next_token.
+    - Users are fetched concurrently by a thread pool, with a bounded number in flight.
+    - Every request takes a token from its endpoint's TokenBucket, which spaces
+      requests across the app-wide budget.
+    - The x-rate-limit-* headers of each response are fed into a TokenBucket per user
+      and endpoint: its tokens are the requests left in the window (minus `reserve`),
+      spread over the time to the reset. A user whose bucket is empty, or who gets a
+      429, is set aside and resumed once the window allows it, so the pool keeps
+      fetching the other users instead of sleeping.
+    """
+
+    def __init__(self, endpoint_rates=None, default_rate=10, max_workers=16, page_size=100, max_pages=10,
+                 reserve=1, max_retries=3):
+        """
+        :param endpoint_rates: Requests per second per endpoint URL, defaults to DEFAULT_ENDPOINT_RATES.
+        :param default_rate: Requests per second for endpoints not listed.
+        :param max_workers: Users fetched concurrently.
+        :param page_size: max_results requested per page.
+        :param max_pages: Pages fetched per user per call.
+        :param reserve: Requests left in a rate-limit window at which to stop and wait for the reset.
+        :param max_retries: Attempts per page after a network error, and 429s per user before giving up.
+        """
+        self.endpoint_rates = dict(DEFAULT_ENDPOINT_RATES if endpoint_rates is None else endpoint_rates)
+        self.default_rate = default_rate
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.reserve = reserve
+        self.max_retries = max_retries
+        # 429s are handled here from the rate-limit headers, not retried blindly by urllib3
+        self.session = transport.new_session(retry_statuses=(500, 502, 503, 504))
+        self.buckets = {}   # endpoint -> TokenBucket
+        self.windows = {}   # (endpoint, user_id) -> TokenBucket fed from the x-rate-limit-* headers
+        self.failed = []    # users whose fetch failed in the last fetch_many()
+        self.incomplete = {}   # user_id -> pagination token, for users cut off at max_pages in the last fetch_many()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "pages": 0, "posts": 0, "users": 0, "rate_limited": 0,
+                         "deferred": 0, "backoffs": 0, "backoff_seconds": 0.0, "errors": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _bucket(self, endpoint):
+        with self._lock:
+            bucket = self.buckets.get(endpoint)
+            if bucket is None:
+                bucket = self.buckets[endpoint] = TokenBucket(self.endpoint_rates.get(endpoint, self.default_rate))
+            return bucket
+
+    def _take_window(self, key):
+        with self._lock:
+            window = self.windows.get(key)
+        if window is not None and not window.try_acquire():
+            raise RateLimitedError(f"Rate-limit window of {key[1]} on {key[0]} is used up",
+                                   time.time() + window.delay())
+
+    def _sleep_until(self, reset):
+        delay = reset - time.time()
+        if delay > 0:
+            self._count("backoffs")
+            self._count("backoff_seconds", delay)
+            time.sleep(delay)
+
+    def _update_window(self, key, remaining, reset, limit=None):
+        # Requests we may still use, spread over the rest of the window; with none left,
+        # the bucket refills its first token at the reset.
+        usable = max(0, remaining - self.reserve)
+        seconds_left = max(reset - time.time(), 1.0)
+        with self._lock:
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = TokenBucket(1.0, capacity=max(limit or 0, usable, 1))
+        window.update(rate=max(usable, 1) / seconds_left, tokens=usable, capacity=limit)
+
+    def _record_limits(self, key, headers):
+        try:
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset = float(headers["x-rate-limit-reset"])
+            limit = int(headers["x-rate-limit-limit"]) if "x-rate-limit-limit" in headers else None
+        except (KeyError, ValueError):
+            return
+        self._update_window(key, remaining, reset, limit)
+
+    def _get_page(self, endpoint, user_id, token, params):
+        """
+        Fetches one page. Raises RateLimitedError instead of waiting when the user's window is used up.
+        """
+        key = (endpoint, user_id)
+        headers = {"Authorization": f"Bearer {_access_token(token)}"}
+        for attempt in range(self.max_retries + 1):
+            self._take_window(key)
+            self._bucket(endpoint).acquire()
+            self._count("requests")
+            try:
+                response = self.session.get(endpoint, headers=headers, params=params,
+                                            timeout=(transport.TRANSPORT_CONFIG["connect_timeout"],
+                                                     transport.TRANSPORT_CONFIG["read_timeout"]))
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"Request to {endpoint} failed: {e}")
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code == 429:
+                self._count("rate_limited")
+                try:
+                    reset = float(response.headers.get("x-rate-limit-reset", 0))
+                except ValueError:
+                    reset = 0.0
+                if reset <= time.time():
+                    # No usable reset header: sit out a full 15-minute window
+                    reset = time.time() + 900
+                self._update_window(key, 0, reset)
+                raise RateLimitedError(f"Rate limited on {endpoint} for {user_id}", reset, rejected=True)
+            self._record_limits(key, response.headers)
+            if response.status_code == 200:
+                return response.json()
+            raise RuntimeError(f"Request to {endpoint} failed with status {response.status_code}: {response.text}")
+
+    def _next_page(self, job):
+        """
+        Fetches the job's next page into job.posts.
+        :return: The page's posts.
+        """
+        page = self._get_page(job.url, job.user_id, job.token, job.params)
+        self._count("pages")
+        posts = page.get("data", [])
+        self._count("posts", len(posts))
+        job.posts.extend(posts)
+        job.pages_left -= 1
+        next_token = page.get("meta", {}).get("next_token")
+        if next_token:
+            job.params = dict(job.params, pagination_token=next_token)
+        else:
+            job.complete = True
+        job.done = job.complete or job.pages_left <= 0
+        return posts
+
+    def iter_timeline(self, user_id, token, url=POSTS_URL, since_id=None, max_pages=None):
+        """
+        Streams one user's posts, page by page, following pagination tokens.
+        Runs in the caller's thread, so it waits out rate limits itself.
+        :param user_id: Key the rate-limit state is tracked under (e.g. the X user id).
+        :param token: OAuth2 token dict or access-token string for the user.
+        :param url: Timeline endpoint.
+        :param since_id: Only return posts newer than this id.
+        :param max_pages: Overrides the fetcher's max_pages.
+        :return: Generator of post dicts.
+        """
+        job = TimelineJob(user_id, token, url, since_id, max_pages or self.max_pages, self.page_size)
+        while not job.done:
+            try:
+                posts = self._next_page(job)
+            except RateLimitedError as e:
+                job.rate_limited += e.rejected
+                if job.rate_limited > self.max_retries:
+                    raise RuntimeError(f"Still rate limited on {url} after {self.max_retries} retries")
+                self._sleep_until(e.retry_at)
+                continue
+            job.posts = []
+            yield from posts
+
+    def _run(self, job):
+        # Pool worker: fetch until done or rate limited; a rate-limited job is handed back, not waited on
+        while not job.done:
+            try:
+                self._next_page(job)
+            except RateLimitedError as e:
+                job.rate_limited += e.rejected
+                job.retry_at = e.retry_at
+                return job
+        return job
+
+    def fetch_many(self, users, url=POSTS_URL, since_ids=None, resume_tokens=None):
+        """
+        Fetches the timelines of many users concurrently, yielding each as soon as it completes.
+        At most 2 * max_workers users are queued at a time, so `users` can be a long generator.
+        Rate-limited users are set aside and resumed after their reset while the others continue.
+        :param users: Iterable of (user_id, token) pairs.
+        :param url: Timeline endpoint.
+        :param since_ids: Optional dictionary of user_id -> since_id.
+        :param resume_tokens: Optional dictionary of user_id -> pagination token to continue from
+                              (see self.incomplete).
+        :return: Generator of (user_id, [posts]). Users that fail are counted, listed in self.failed and skipped.
+                 Users cut off at max_pages before reaching since_id are listed in self.incomplete.
+        """
+        since_ids = since_ids or {}
+        resume_tokens = resume_tokens or {}
+        self.failed = []
+        self.incomplete = {}
+        users = iter(users)
+        limit = 2 * self.max_workers
+        in_flight = {}     # future -> job
+        deferred = []      # heap of (retry_at, sequence, job)
+        sequence = itertools.count()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                while deferred and deferred[0][0] <= time.time() and len(in_flight) < limit:
+                    job = heapq.heappop(deferred)[2]
+                    in_flight[pool.submit(self._run, job)] = job
+                while users is not None and len(in_flight) < limit:
+                    try:
+                        user_id, token = next(users)
+                    except StopIteration:
+                        users = None
+                        break
+                    job = TimelineJob(user_id, token, url, since_ids.get(user_id), self.max_pages, self.page_size)
+                    if resume_tokens.get(user_id):
+                        job.params["pagination_token"] = resume_tokens[user_id]
+                    in_flight[pool.submit(self._run, job)] = job
+                if not in_flight:
+                    if not deferred:
+                        return
+                    # Only rate-limited users left: wait here, in the consumer, not in a worker
+                    self._sleep_until(deferred[0][0])
+                    continue
+                timeout = max(0.0, deferred[0][0] - time.time()) if deferred else None
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self._fail(job, e)
+                        continue
+                    if job.done:
+                        self._count("users")
+                        if not job.complete:
+                            self.incomplete[job.user_id] = job.next_token
+                        yield job.user_id, job.posts
+                    elif job.rate_limited > self.max_retries:
+                        self._fail(job, RuntimeError(f"Still rate limited on {url} after {self.max_retries} retries"))
+                    else:
+                        self._count("deferred")
+                        heapq.heappush(deferred, (job.retry_at, next(sequence), job))
+
+    def _fail(self, job, error):
+        self._count("errors")
+        self.failed.append(job.user_id)
+        print(f"Failed to fetch timeline for {job.user_id}: {error}")
+
+    def close(self):
+        self.session.close()
+
+
+# Example Usage:
+if __name__ == "__main__":
+    import os
+
+    fetcher = XTimelineFetcher(max_workers=16)
+    # (user_id, OAuth2 token) pairs saved when each user authorized the app
+    users = [(os.getenv("X_USER_ID", "me"), os.getenv("X_ACCESS_TOKEN", "YOUR_ACCESS_TOKEN"))]
+    for user_id, posts in fetcher.fetch_many(users):
+        interactions = sum(1 for post in posts if post.get("liked") or post.get("retweeted"))
+        print(f"{user_id}: {len(posts)} posts, {interactions} interactions")
+    print(fetcher.counters)
+    fetcher.close()